@@ -0,0 +1,585 @@
+"""Bancs d'essai des composants de reconnaissance faciale.
+
+Usage :
+    python benchmark.py ann [--size 20000] [--dim 128] [--database local|mysql]
+    python benchmark.py templates [--students 500] [--images 8]
+    python benchmark.py quantized [--size 5000] [--dim 16384] [--rerank 32]
+    python benchmark.py tracking --video <fichier vidéo ou numéro de caméra> [--interval 5]
+    python benchmark.py detection --video <fichier vidéo ou numéro de caméra> [--width 320]
+    python benchmark.py detectors --images <dossier d'images> [--backends haar lbp dnn]
+    python benchmark.py capture --video <fichier vidéo ou numéro de caméra> [--work-ms 40]
+    python benchmark.py render [--video <fichier>] [--width 1280 --height 720]
+    python benchmark.py motion --video <fichier vidéo ou numéro de caméra> [--frames 600]
+    python benchmark.py database [--database local|mysql] [--queries 500]
+    python benchmark.py scheduler --video <fichier vidéo ou numéro de caméra> [--seconds 5] [--work-ms 0]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import numpy as np
+from src import face_matcher
+from src.ann_index import IVFIndex
+from src.face_templates import StudentTemplates
+from src.quantized_index import QuantizedIndex
+
+
+def synthetic_gallery(size, dim, identities, noise, seed=0):
+    """Galerie aléatoire : plusieurs modèles bruités par identité"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(0, 1, (identities, dim))
+    labels = rng.integers(0, identities, size)
+    return centers, centers[labels] + rng.normal(0, noise, (size, dim))
+
+
+def load_gallery_matrix(database):
+    from database.connection import DatabaseConnection
+    from src.face_gallery import FaceGallery
+    from src.image_processor import ImageProcessor
+
+    gallery = FaceGallery(DatabaseConnection(use_local=database == 'local'), ImageProcessor())
+    return np.asarray(gallery.ensure_loaded().matrix), gallery.metric
+
+
+def timed(function, queries):
+    start = time.perf_counter()
+    results = [function(query) for query in queries]
+    return results, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def resident_memory():
+    """Mémoire résidente (octets) du processus courant : (privée, fichiers projetés), ou None hors Linux.
+
+    Les pages de fichiers projetés (mmap) sont partagées entre processus et
+    peuvent être libérées par le système à tout moment, contrairement aux pages privées.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            fields = dict(line.split(':', 1) for line in f)
+        return tuple(int(fields[name].split()[0]) * 1024 for name in ('RssAnon', 'RssFile'))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def quantized_search_rss(directory, quantized, queries, rerank):
+    """Mémoire résidente ajoutée par une recherche sur l'instantané enregistré dans directory.
+
+    Lancé dans un processus neuf : float64 charge les vecteurs préparés en mémoire,
+    int8 ne charge que les codes et relit les vecteurs re-classés dans l'instantané (mmap),
+    comme FaceGallery avec GALLERY_QUANTIZED.
+    """
+    start = resident_memory()
+    mmap_mode = 'r' if quantized else None
+    prepared = face_matcher.PreparedGallery.from_arrays(
+        None, *(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+                for name in face_matcher.PreparedGallery.SNAPSHOT_ARRAYS))
+    if quantized:
+        index = QuantizedIndex(rerank=rerank)
+        with np.load(os.path.join(directory, 'index.npz')) as data:
+            index.load_arrays(dict(data))
+        for query in queries:
+            index.search(query, prepared)
+    else:
+        for query in queries:
+            face_matcher.best_match(query, prepared)
+    end = resident_memory()
+    return None if start is None or end is None else tuple(e - s for s, e in zip(start, end))
+
+
+def read_frames(video, count):
+    """Lit jusqu'à count images d'un fichier vidéo ou d'une caméra (numéro)"""
+    import cv2
+
+    capture = cv2.VideoCapture(int(video) if video.isdigit() else video)
+    frames = []
+    while len(frames) < count:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(frame)
+    capture.release()
+    if not frames:
+        raise SystemExit(f"Aucune image lue depuis {video}")
+    return frames
+
+
+def cpu_timed(function, frames):
+    """Retourne (résultats, ms réelles par image, ms CPU par image)"""
+    start, start_cpu = time.perf_counter(), time.process_time()
+    results = [function(frame) for frame in frames]
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - start_cpu
+    return results, elapsed / len(frames) * 1000, cpu / len(frames) * 1000
+
+
+def benchmark_ann(args):
+    rng = np.random.default_rng(1)
+    metric = 'cosine'
+    if args.database:
+        matrix, metric = load_gallery_matrix(args.database)
+        probes = matrix[rng.integers(0, len(matrix), args.queries)]
+        queries = probes + rng.normal(0, args.noise * probes.std(), probes.shape)
+    else:
+        centers, matrix = synthetic_gallery(args.size, args.dim, args.size // 4, args.noise)
+        queries = centers[rng.integers(0, len(centers), args.queries)]
+        queries = queries + rng.normal(0, args.noise, queries.shape)
+
+    prepared = face_matcher.prepare_gallery(matrix, metric)
+    exact, exact_ms = timed(lambda q: face_matcher.best_match(q, prepared)[0], queries)
+
+    start = time.perf_counter()
+    index = IVFIndex(metric, args.lists, pq_subvectors=args.pq, rerank=args.rerank).build(prepared)
+    build_s = time.perf_counter() - start
+
+    print(f"Galerie : {len(matrix)} modèles de dimension {matrix.shape[1]}, {len(queries)} requêtes")
+    print(f"Index : {len(index.centroids)} listes, PQ : {args.pq or 'non'}, construit en {build_s:.2f} s")
+    print(f"Recherche exhaustive : {exact_ms:.3f} ms/requête")
+    print(f"{'nprobe':>8} {'rappel@1':>10} {'ms/requête':>12} {'accélération':>14}")
+    for nprobe in (1, 2, 4, 8, 16, 32, 64):
+        if nprobe > len(index.centroids):
+            break
+        found, ms = timed(lambda q: index.search(q, prepared, nprobe)[0], queries)
+        recall = np.mean([a == b for a, b in zip(found, exact)])
+        print(f"{nprobe:>8} {recall:>10.3f} {ms:>12.3f} {exact_ms / ms:>13.1f}x")
+
+
+def benchmark_templates(args):
+    rng = np.random.default_rng(2)
+    centers = rng.normal(0, 1, (args.students, args.dim))
+    student_ids = np.repeat(np.arange(args.students), args.images)
+    matrix = centers[student_ids] + rng.normal(0, args.noise, (len(student_ids), args.dim))
+    query_ids = rng.integers(0, args.students, args.queries)
+    queries = centers[query_ids] + rng.normal(0, args.noise, (args.queries, args.dim))
+
+    prepared = face_matcher.prepare_gallery(matrix)
+    print(f"{args.students} étudiants x {args.images} images, dimension {args.dim}")
+    print(f"{'mode':>8} {'modèles':>9} {'exactitude':>11} {'ms/requête':>12}")
+    for mode in ('image', 'mean', 'medoids'):
+        if mode == 'image':
+            search, rows = prepared, np.arange(len(matrix))
+        else:
+            templates = StudentTemplates(mode, args.medoids).build(prepared, student_ids)
+            search, rows = templates.prepared, templates.template_rows
+        found, ms = timed(lambda q: face_matcher.best_match(q, search)[0], queries)
+        accuracy = np.mean([f is not None and student_ids[rows[f]] == s for f, s in zip(found, query_ids)])
+        print(f"{mode:>8} {len(search):>9} {accuracy:>11.3f} {ms:>12.3f}")
+
+
+def benchmark_quantized(args):
+    rng = np.random.default_rng(3)
+    centers, matrix = synthetic_gallery(args.size, args.dim, args.size // 4, args.noise)
+    query_ids = rng.integers(0, len(centers), args.queries)
+    queries = centers[query_ids] + rng.normal(0, args.noise, (args.queries, args.dim))
+
+    prepared = face_matcher.prepare_gallery(matrix)
+    exact, exact_ms = timed(lambda q: face_matcher.best_match(q, prepared), queries)
+    index = QuantizedIndex(rerank=args.rerank).build(prepared)
+    float_bytes = prepared.standardized.nbytes
+    int8_bytes = index.codes.nbytes + index.scales.nbytes
+
+    print(f"Galerie : {args.size} modèles de dimension {args.dim}, {args.queries} requêtes")
+    print(f"Mémoire : float64 {float_bytes / 2**20:.1f} Mio, int8 {int8_bytes / 2**20:.1f} Mio "
+          f"({float_bytes / int8_bytes:.1f}x)")
+    print(f"Recherche float64 : {exact_ms:.3f} ms/requête")
+    print(f"{'rerank':>8} {'accord@1':>10} {'écart conf.':>12} {'ms/requête':>12} {'accélération':>14}")
+    for rerank in (1, 4, 16, args.rerank, 128):
+        found, ms = timed(lambda q: index.search(q, prepared, rerank), queries)
+        agreement = np.mean([a[0] == b[0] for a, b in zip(found, exact)])
+        gap = max(abs(a[1] - b[1]) for a, b in zip(found, exact))
+        print(f"{rerank:>8} {agreement:>10.3f} {gap:>12.4f} {ms:>12.3f} {exact_ms / ms:>13.1f}x")
+
+    # Mémoire résidente réellement occupée, chaque mode dans un processus neuf
+    with tempfile.TemporaryDirectory() as directory:
+        for name in face_matcher.PreparedGallery.SNAPSHOT_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(prepared, name))
+        np.savez(os.path.join(directory, 'index.npz'), **index.to_arrays())
+        with multiprocessing.get_context('spawn').Pool(1) as pool:
+            rss = [pool.apply(quantized_search_rss, (directory, quantized, queries, args.rerank))
+                   for quantized in (False, True)]
+    if None in rss:
+        print("RSS : non disponible sur ce système")
+    else:
+        (float_private, _), (int8_private, int8_file) = rss
+        print(f"RSS privée après {args.queries} requêtes : float64 {float_private / 2**20:.1f} Mio, "
+              f"int8 {int8_private / 2**20:.1f} Mio ({float_private / max(int8_private, 1):.1f}x) "
+              f"+ {int8_file / 2**20:.1f} Mio de lignes re-classées lues dans l'instantané (mmap)")
+
+
+def benchmark_tracking(args):
+    from src.image_processor import ImageProcessor
+    from src.face_tracker import FaceTracker, iou
+
+    frames = read_frames(args.video, args.frames)
+    processor = ImageProcessor()
+    detected, detect_ms, detect_cpu = cpu_timed(lambda frame: list(processor.detect_faces(frame)), frames)
+    print(f"{len(frames)} images {frames[0].shape[1]}x{frames[0].shape[0]}, "
+          f"visage détecté dans {np.mean([len(d) > 0 for d in detected]):.0%} d'entre elles")
+    print(f"{'intervalle':>10} {'détections':>11} {'ms/image':>9} {'ms CPU':>8} {'économie CPU':>13} {'accord':>7}")
+    print(f"{'1':>10} {len(frames):>11} {detect_ms:>9.2f} {detect_cpu:>8.2f} {'-':>13} {'-':>7}")
+    for interval in sorted({2, args.interval, 10}):
+        # Détection pleine résolution, pour ne mesurer que l'effet du suivi
+        tracker = FaceTracker(lambda gray, regions: processor.detect_faces(gray), interval)
+        tracked, ms, cpu = cpu_timed(lambda frame: [t.box for t in tracker.update(frame)], frames)
+        # Accord : boîte suivie recouvrant la détection de référence (images à un seul visage)
+        pairs = [(t, d) for t, d in zip(tracked, detected) if len(d) == 1]
+        agreement = np.mean([len(t) == 1 and iou(t[0], d[0]) >= 0.5 for t, d in pairs]) if pairs else float('nan')
+        print(f"{interval:>10} {tracker.detections:>11} {ms:>9.2f} {cpu:>8.2f} "
+              f"{1 - cpu / detect_cpu:>13.0%} {agreement:>7.0%}")
+
+
+def benchmark_detection(args):
+    import cv2
+    from src.image_processor import ImageProcessor
+    from src.face_detection import FrameDetector, face_size_range
+    from src.face_tracker import iou
+
+    frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in read_frames(args.video, args.frames)]
+    processor = ImageProcessor()
+    reference, reference_ms, _ = cpu_timed(lambda gray: list(processor.detect_faces(gray)), frames)
+    min_size, max_size = face_size_range(frames[0].shape[1])
+    print(f"{len(frames)} images {frames[0].shape[1]}x{frames[0].shape[0]}, "
+          f"visages attendus entre {min_size} et {max_size} px")
+    print(f"{'stratégie':>26} {'ms/image':>9} {'accélération':>13} {'taux détection':>15} {'accord':>7}")
+
+    def report(name, boxes, ms):
+        rate = np.mean([len(b) > 0 for b in boxes])
+        pairs = [(b, r) for b, r in zip(boxes, reference) if len(r) == 1]
+        agreement = np.mean([any(iou(box, r[0]) >= 0.5 for box in b) for b, r in pairs]) if pairs else float('nan')
+        print(f"{name:>26} {ms:>9.2f} {reference_ms / ms:>12.1f}x {rate:>15.0%} {agreement:>7.0%}")
+
+    report("pleine résolution", reference, reference_ms)
+    resized = FrameDetector(processor.detect_faces, args.width)
+    boxes, ms, _ = cpu_timed(resized, frames)
+    report(f"réduite à {args.width} px", boxes, ms)
+
+    # Régions d'intérêt : visages trouvés dans l'image précédente
+    roi = FrameDetector(processor.detect_faces, args.width)
+    previous = []
+
+    def detect_with_roi(gray):
+        nonlocal previous
+        previous = roi(gray, previous)
+        return previous
+
+    boxes, ms, _ = cpu_timed(detect_with_roi, frames)
+    report("réduite + régions", boxes, ms)
+
+
+def benchmark_detectors(args):
+    import os
+    import cv2
+    from src.face_detectors import DETECTORS
+
+    extensions = ('.jpg', '.jpeg', '.png', '.bmp')
+    paths = sorted(os.path.join(root, name) for root, _, names in os.walk(args.images)
+                   for name in names if name.lower().endswith(extensions))
+    images = [image for image in (cv2.imread(path) for path in paths) if image is not None]
+    if not images:
+        raise SystemExit(f"Aucune image lisible dans {args.images}")
+
+    print(f"{len(images)} images de {args.images}")
+    print(f"{'détecteur':>10} {'ms/image':>9} {'taux détection':>15} {'visages/image':>14}")
+    for name in args.backends:
+        try:
+            detector = DETECTORS[name]()
+        except (FileNotFoundError, ValueError, cv2.error) as e:
+            print(f"{name:>10} indisponible : {e}")
+            continue
+        detector.detect(images[0])
+        boxes, ms, _ = cpu_timed(detector.detect, images)
+        counts = [len(b) for b in boxes]
+        print(f"{name:>10} {ms:>9.2f} {np.mean([c > 0 for c in counts]):>15.0%} {np.mean(counts):>14.2f}")
+
+
+def benchmark_capture(args):
+    from src.frame_grabber import FrameGrabber
+
+    # Consommateur simulé : chaque image occupe le thread principal pendant work_ms
+    grabber = FrameGrabber(args.video).start()
+    if not grabber.isOpened():
+        raise SystemExit(f"Impossible d'ouvrir {args.video}")
+    start = time.perf_counter()
+    processed = 0
+    while processed < args.frames:
+        ret, _ = grabber.read()
+        if not ret:
+            break
+        processed += 1
+        time.sleep(args.work_ms / 1000)
+    elapsed = time.perf_counter() - start
+    stats = grabber.stats()
+    grabber.release()
+    print(f"Capture : {stats['captured']} images à {stats['fps']:.1f} im/s")
+    print(f"Traitement : {processed} images en {elapsed:.1f} s ({processed / elapsed:.1f} im/s), "
+          f"{stats['dropped']} images anciennes abandonnées")
+
+
+def benchmark_render(args):
+    import cv2
+    import tkinter as tk
+    from PIL import Image, ImageTk
+    from src.preview_renderer import PreviewRenderer
+
+    if args.video:
+        frames = read_frames(args.video, args.frames)
+    else:
+        rng = np.random.default_rng(4)
+        frames = [rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8) for _ in range(8)]
+        frames = [frames[i % len(frames)] for i in range(args.frames)]
+
+    # La création de PhotoImage nécessite un affichage ; sans lui seule la conversion est mesurée
+    try:
+        root = tk.Tk()
+        root.withdraw()
+        label = tk.Label(root)
+    except tk.TclError:
+        root = label = None
+        print("Pas d'affichage disponible : PhotoImage non mesurée")
+
+    def previous(frame):
+        image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).resize((640, 480))
+        if label is not None:
+            label.photo = ImageTk.PhotoImage(image=image)
+            label.configure(image=label.photo)
+
+    renderer = PreviewRenderer(label)
+    current = renderer.render if label is not None else renderer.convert
+
+    print(f"{len(frames)} images {frames[0].shape[1]}x{frames[0].shape[0]} affichées en 640x480")
+    _, before_ms, before_cpu = cpu_timed(previous, frames)
+    _, after_ms, after_cpu = cpu_timed(current, frames)
+    print(f"{'rendu':>22} {'ms/image':>9} {'ms CPU':>8}")
+    print(f"{'PIL + PhotoImage':>22} {before_ms:>9.3f} {before_cpu:>8.3f}")
+    print(f"{'tampons + paste()':>22} {after_ms:>9.3f} {after_cpu:>8.3f}")
+    print(f"Accélération : {before_ms / after_ms:.1f}x")
+    if root is not None:
+        root.destroy()
+
+
+def benchmark_motion(args):
+    from src.face_detection import FrameDetector
+    from src.face_tracker import FaceTracker
+    from src.image_processor import ImageProcessor
+    from src.motion_gate import MotionGate
+
+    frames = read_frames(args.video, args.frames)
+    processor = ImageProcessor()
+    print(f"{len(frames)} images {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    # Détection et suivi à chaque image, comme sans filtre
+    tracker = FaceTracker(FrameDetector(processor.detect_faces))
+    reference, ms, cpu = cpu_timed(lambda frame: len(tracker.update(frame)), frames)
+
+    gate = MotionGate()
+    gated_tracker = FaceTracker(FrameDetector(processor.detect_faces))
+
+    def gated(frame):
+        if not gate.should_analyze(frame, bool(gated_tracker.tracks)):
+            return 0
+        return len(gated_tracker.update(frame))
+
+    faces, gated_ms, gated_cpu = cpu_timed(gated, frames)
+    # Images où un visage était vu sans filtre mais pas avec
+    missed = sum(1 for r, f in zip(reference, faces) if r and not f)
+    print(f"{'filtre':>8} {'ms/image':>9} {'ms CPU':>8} {'détections':>11}")
+    print(f"{'sans':>8} {ms:>9.2f} {cpu:>8.2f} {tracker.detections:>11}")
+    print(f"{'avec':>8} {gated_ms:>9.2f} {gated_cpu:>8.2f} {gated_tracker.detections:>11}")
+    print(f"Images sans analyse : {gate.skipped / gate.frames:.0%}, économie CPU : {1 - gated_cpu / cpu:.0%}, "
+          f"images avec visage manquées : {missed}")
+
+
+def benchmark_database(args):
+    from database.connection import DatabaseConnection
+
+    db = DatabaseConnection(use_local=args.database == 'local')
+    query = "SELECT COUNT(*) FROM Classe"
+    if db.execute_query(query) is None:
+        raise SystemExit("Base de données inaccessible")
+
+    def per_query(_):
+        # Chemin précédent : connexion ouverte, schéma vérifié puis connexion fermée à chaque requête
+        connection = db._open()
+        db.initialize_schema(connection)
+        cursor = connection.cursor()
+        cursor.execute(query)
+        result = cursor.fetchall()
+        connection.commit()
+        cursor.close()
+        connection.close()
+        return result
+
+    queries = range(args.queries)
+    _, before_ms = timed(per_query, queries)
+    _, after_ms = timed(lambda _: db.execute_query(query), queries)
+    pool = db.get_pool()
+    print(f"{args.queries} requêtes ({args.database}), {pool.connections_opened} connexion(s) ouverte(s) par la réserve")
+    print(f"{'connexion par requête':>22} {before_ms * 1000:>9.1f} µs/requête")
+    print(f"{'réserve de connexions':>22} {after_ms * 1000:>9.1f} µs/requête")
+    print(f"Accélération : {before_ms / after_ms:.1f}x")
+    db.close()
+
+
+def benchmark_scheduler(args):
+    from src.face_detection import FrameDetector
+    from src.face_tracker import FaceTracker
+    from src.frame_grabber import FrameGrabber
+    from src.frame_scheduler import FrameScheduler
+    from src.image_processor import ImageProcessor
+    from src.preview_renderer import PreviewRenderer
+    from src.recognition_pipeline import RecognitionPipeline
+
+    processor = ImageProcessor()
+
+    class DetectionAnalyzer:
+        # Détection et suivi seuls (sans galerie), plus work_ms de calcul simulé
+        threshold = 0
+
+        def __init__(self):
+            self.tracker = FaceTracker(FrameDetector(processor.detect_faces))
+
+        def analyze(self, frame, class_name=None):
+            started = time.perf_counter()
+            self.tracker.update(frame)
+            while time.perf_counter() - started < args.work_ms / 1000:
+                pass
+            return {'elapsed': time.perf_counter() - started}
+
+    def run(scheduler):
+        # Boucle Tk simulée : after(delay) remplacé par une attente
+        grabber = FrameGrabber(args.video).start()
+        if not grabber.isOpened():
+            raise SystemExit(f"Impossible d'ouvrir {args.video}")
+        pipeline = RecognitionPipeline(DetectionAnalyzer(), mode='thread')
+        renderer = PreviewRenderer(None)
+        analyses = previews = 0
+        start, start_cpu = time.perf_counter(), time.process_time()
+        while grabber.running and time.perf_counter() - start < args.seconds:
+            started = time.perf_counter()
+            if scheduler is None:
+                # Boucle précédente : attente d'une image, analyse et aperçu à chaque passage, after(10)
+                ret, frame = grabber.read(timeout=0.1)
+                if ret:
+                    pipeline.submit(frame)
+                    renderer.convert(frame)
+                    previews += 1
+                analyses += len(pipeline.poll())
+                time.sleep(0.01)
+                continue
+            recognize, preview = scheduler.due(started)
+            ret = False
+            if recognize or preview:
+                ret, frame = grabber.read(timeout=0)
+            if ret:
+                if recognize:
+                    pipeline.submit(frame)
+                if preview:
+                    renderer.convert(frame)
+                    previews += 1
+            for result in pipeline.poll():
+                scheduler.record_recognition(result['elapsed'])
+                analyses += 1
+            scheduler.record_iteration(started, ret and recognize, ret and preview)
+            time.sleep(scheduler.next_delay((recognize or preview) and not ret) / 1000)
+        elapsed, cpu = time.perf_counter() - start, time.process_time() - start_cpu
+        pipeline.shutdown()
+        grabber.release()
+        return analyses / elapsed, previews / elapsed, cpu / elapsed
+
+    print(f"{'boucle':>10} {'analyses/s':>11} {'aperçus/s':>10} {'CPU':>6} {'cadences finales':>22}")
+    analyses, previews, cpu = run(None)
+    print(f"{'after(10)':>10} {analyses:>11.1f} {previews:>10.1f} {cpu:>6.0%} {'-':>22}")
+    for profile in ('normal', 'low_power'):
+        scheduler = FrameScheduler(profile=profile)
+        analyses, previews, cpu = run(scheduler)
+        stats = scheduler.stats()
+        rates = f"{stats['recognition_fps']:.1f} / {stats['preview_fps']:.1f} im/s"
+        print(f"{profile:>10} {analyses:>11.1f} {previews:>10.1f} {cpu:>6.0%} {rates:>22}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bancs d'essai EduFace")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ann = commands.add_parser('ann', help="Rappel et latence de l'index IVF selon nprobe")
+    ann.add_argument('--size', type=int, default=20000, help="Taille de la galerie synthétique")
+    ann.add_argument('--dim', type=int, default=128, help="Dimension des modèles synthétiques")
+    ann.add_argument('--queries', type=int, default=200, help="Nombre de requêtes")
+    ann.add_argument('--noise', type=float, default=0.3, help="Bruit ajouté aux requêtes")
+    ann.add_argument('--lists', type=int, default=0, help="Nombre de listes (0 : automatique)")
+    ann.add_argument('--pq', type=int, default=0, help="Sous-vecteurs PQ (0 : désactivé)")
+    ann.add_argument('--rerank', type=int, default=64, help="Candidats re-classés après PQ")
+    ann.add_argument('--database', choices=('local', 'mysql'),
+                     help="Utiliser la galerie de la base au lieu de données synthétiques")
+    ann.set_defaults(run=benchmark_ann)
+
+    templates = commands.add_parser('templates', help="Modèles par image, moyens ou médoïdes par étudiant")
+    templates.add_argument('--students', type=int, default=500, help="Nombre d'étudiants")
+    templates.add_argument('--images', type=int, default=8, help="Images par étudiant")
+    templates.add_argument('--medoids', type=int, default=3, help="Médoïdes par étudiant")
+    templates.add_argument('--dim', type=int, default=128, help="Dimension des vecteurs")
+    templates.add_argument('--queries', type=int, default=200, help="Nombre de requêtes")
+    templates.add_argument('--noise', type=float, default=0.4, help="Bruit des images et des requêtes")
+    templates.set_defaults(run=benchmark_templates)
+
+    quantized = commands.add_parser('quantized', help="Galerie int8 comparée à la recherche float64")
+    quantized.add_argument('--size', type=int, default=5000, help="Taille de la galerie synthétique")
+    quantized.add_argument('--dim', type=int, default=16384, help="Dimension des modèles synthétiques")
+    quantized.add_argument('--queries', type=int, default=100, help="Nombre de requêtes")
+    quantized.add_argument('--noise', type=float, default=0.5, help="Bruit des modèles et des requêtes")
+    quantized.add_argument('--rerank', type=int, default=32, help="Candidats re-classés en float64")
+    quantized.set_defaults(run=benchmark_quantized)
+
+    tracking = commands.add_parser('tracking', help="Détection à chaque image ou détection puis suivi")
+    tracking.add_argument('--video', required=True, help="Fichier vidéo ou numéro de caméra")
+    tracking.add_argument('--frames', type=int, default=300, help="Nombre maximal d'images lues")
+    tracking.add_argument('--interval', type=int, default=5, help="Images entre deux détections")
+    tracking.set_defaults(run=benchmark_tracking)
+
+    detection = commands.add_parser('detection', help="Détection pleine résolution, réduite et par régions")
+    detection.add_argument('--video', required=True, help="Fichier vidéo ou numéro de caméra")
+    detection.add_argument('--frames', type=int, default=300, help="Nombre maximal d'images lues")
+    detection.add_argument('--width', type=int, default=320, help="Largeur de l'image réduite")
+    detection.set_defaults(run=benchmark_detection)
+
+    detectors = commands.add_parser('detectors', help="Latence et taux de détection de chaque détecteur")
+    detectors.add_argument('--images', required=True, help="Dossier d'images de test (parcouru récursivement)")
+    detectors.add_argument('--backends', nargs='+', default=['haar', 'lbp', 'dnn'],
+                           choices=['haar', 'lbp', 'dnn'], help="Détecteurs comparés")
+    detectors.set_defaults(run=benchmark_detectors)
+
+    capture = commands.add_parser('capture', help="Cadence de capture et images abandonnées par le thread de lecture")
+    capture.add_argument('--video', required=True, help="Fichier vidéo ou numéro de caméra")
+    capture.add_argument('--frames', type=int, default=300, help="Nombre maximal d'images traitées")
+    capture.add_argument('--work-ms', type=float, default=40, help="Durée simulée du traitement d'une image")
+    capture.set_defaults(run=benchmark_capture)
+
+    render = commands.add_parser('render', help="Coût par image de l'affichage de l'aperçu caméra")
+    render.add_argument('--video', help="Fichier vidéo (images aléatoires sinon)")
+    render.add_argument('--frames', type=int, default=200, help="Nombre d'images affichées")
+    render.add_argument('--width', type=int, default=1280, help="Largeur des images aléatoires")
+    render.add_argument('--height', type=int, default=720, help="Hauteur des images aléatoires")
+    render.set_defaults(run=benchmark_render)
+
+    motion = commands.add_parser('motion', help="Images ignorées et CPU économisé par le filtre de mouvement")
+    motion.add_argument('--video', required=True, help="Fichier vidéo ou numéro de caméra")
+    motion.add_argument('--frames', type=int, default=600, help="Nombre maximal d'images lues")
+    motion.set_defaults(run=benchmark_motion)
+
+    database = commands.add_parser('database', help="Latence d'une requête avec et sans réserve de connexions")
+    database.add_argument('--database', choices=['local', 'mysql'], default='local')
+    database.add_argument('--queries', type=int, default=500, help="Nombre de requêtes exécutées")
+    database.set_defaults(run=benchmark_database)
+
+    scheduler = commands.add_parser('scheduler', help="Boucle after(10) comparée au planificateur adaptatif")
+    scheduler.add_argument('--video', required=True, help="Fichier vidéo ou numéro de caméra")
+    scheduler.add_argument('--seconds', type=float, default=5, help="Durée de chaque essai")
+    scheduler.add_argument('--work-ms', type=float, default=0,
+                           help="Calcul ajouté à chaque analyse pour simuler une machine lente")
+    scheduler.set_defaults(run=benchmark_scheduler)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import os
+import sqlite3
+import threading
+import mysql.connector
+from settings import Settings
+
+# Erreurs passagères (serveur injoignable, base verrouillée) : le lot est réessayé plus tard
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError,
+                    mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError)
+# sqlite3.OperationalError couvre aussi des erreurs définitives (table ou colonne
+# inconnue, syntaxe) : seules la base verrouillée ou occupée sont passagères
+SQLITE_TRANSIENT_MESSAGES = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def is_transient(error):
+    """True si l'écriture peut réussir plus tard sans changement"""
+    if isinstance(error, sqlite3.OperationalError):
+        message = str(error).lower()
+        return any(text in message for text in SQLITE_TRANSIENT_MESSAGES)
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+class AttendanceQueue:
+    """Écriture différée des présences.
+
+    put() enregistre la présence dans une file locale (base SQLite « outbox »,
+    conservée sur disque) et rend la main aussitôt ; un thread l'écrit ensuite
+    dans la base principale par lots. En cas d'erreur passagère le lot est
+    réessayé avec un délai croissant ; une présence qui échoue pour une autre
+    raison est mise de côté (failed = 1) sans bloquer les suivantes.
+
+    Une présence n'est retirée de la file qu'après validation dans la base
+    principale. Si l'application s'arrête entre les deux, elle est réécrite au
+    redémarrage : l'upsert sur la clé unique (etudiant_id, date_presence,
+    periode) met alors à jour la même ligne, sans doublon.
+    """
+
+    # Présence d'un étudiant identifié par nom, prénom et classe ({upsert} : voir upsert_clause)
+    ATTENDANCE_QUERY = """
+        INSERT INTO Presences (etudiant_id, date_presence, heure_presence, heure_fin, periode, statut)
+        SELECT e.id, %s, %s, %s, %s, %s
+        FROM Etudiants e
+        WHERE e.nom_famille = %s AND e.prenom = %s AND e.id_classe = %s
+        {upsert}
+    """
+
+    OUTBOX_COLUMNS = ('date_presence', 'heure_presence', 'heure_fin', 'periode', 'statut',
+                      'nom_famille', 'prenom', 'id_classe')
+
+    def __init__(self, db, path=None, batch_size=None, retry_delay=None, max_retry_delay=None):
+        self.db = db
+        if path is None:
+            db_name = os.path.splitext(db.config['database'])[0]
+            path = os.path.join(db.get_data_directory(), f"{db_name}_outbox.db")
+        self.path = path
+        self.batch_size = batch_size or Settings.ATTENDANCE_BATCH_SIZE
+        self.retry_delay = retry_delay or Settings.ATTENDANCE_RETRY_DELAY
+        self.max_retry_delay = max_retry_delay or Settings.ATTENDANCE_MAX_RETRY_DELAY
+        self.query = self.ATTENDANCE_QUERY.format(
+            upsert=db.upsert_clause(('etudiant_id', 'date_presence', 'periode'),
+                                    ('statut', 'heure_presence', 'heure_fin')))
+
+        # Connexion à la file partagée entre l'interface et le thread d'écriture
+        self._outbox = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._drained = threading.Condition()
+        self._running = False
+        self._thread = None
+        with self._lock:
+            # WAL : survit à un arrêt brutal de l'application (pas forcément à une coupure de courant)
+            self._outbox.execute("PRAGMA journal_mode = WAL")
+            self._outbox.execute(f"""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    {', '.join(f'{column} TEXT' for column in self.OUTBOX_COLUMNS[:-1])},
+                    id_classe INTEGER,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            self._outbox.commit()
+
+        # Compteurs : présences écrites dans la base principale et lots réessayés
+        self.written = 0
+        self.retries = 0
+
+    def put(self, student_data):
+        """Met une présence en file (student_data comme pour mark_student_present)"""
+        values = (student_data['date'], student_data['heure'], student_data['heure_fin'],
+                  student_data['periode'], student_data['statut'], student_data['nom'],
+                  student_data['prenom'], student_data['classe_id'])
+        with self._lock:
+            self._outbox.execute(
+                f"INSERT INTO outbox ({', '.join(self.OUTBOX_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(values))})", values)
+            self._outbox.commit()
+        self._wakeup.set()
+
+    def pending(self):
+        """Nombre de présences en attente d'écriture (hors présences mises de côté)"""
+        with self._lock:
+            return self._outbox.execute("SELECT COUNT(*) FROM outbox WHERE failed = 0").fetchone()[0]
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='AttendanceWriter', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        delay = self.retry_delay
+        while self._running:
+            with self._lock:
+                rows = self._outbox.execute(
+                    f"SELECT id, {', '.join(self.OUTBOX_COLUMNS)} FROM outbox "
+                    "WHERE failed = 0 ORDER BY id LIMIT ?", (self.batch_size,)).fetchall()
+            if not rows:
+                with self._drained:
+                    self._drained.notify_all()
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            try:
+                self._write(rows)
+                delay = self.retry_delay
+            except Exception as e:
+                self._record_error(rows, e)
+                if is_transient(e):
+                    # Base principale indisponible : même lot plus tard
+                    print(f"Attendance write failed, retrying in {delay:g} s: {e}")
+                    self.retries += 1
+                    self._wakeup.wait(delay)
+                    self._wakeup.clear()
+                    delay = min(delay * 2, self.max_retry_delay)
+                else:
+                    # Lot refusé : les présences sont réessayées une par une
+                    self._write_one_by_one(rows)
+
+    def _write(self, rows):
+        with self.db.transaction() as transaction:
+            transaction.execute_many(self.query, [row[1:] for row in rows])
+        # Retirées de la file seulement après validation dans la base principale
+        with self._lock:
+            self._outbox.executemany("DELETE FROM outbox WHERE id = ?", [(row[0],) for row in rows])
+            self._outbox.commit()
+        self.written += len(rows)
+
+    def _write_one_by_one(self, rows):
+        for row in rows:
+            try:
+                self._write([row])
+            except Exception as e:
+                if is_transient(e):
+                    return
+                print(f"Attendance record {row[0]} rejected: {e}")
+                with self._lock:
+                    self._outbox.execute("UPDATE outbox SET failed = 1 WHERE id = ?", (row[0],))
+                    self._outbox.commit()
+
+    def _record_error(self, rows, error):
+        with self._lock:
+            self._outbox.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                [(str(error), row[0]) for row in rows])
+            self._outbox.commit()
+
+    def flush(self, timeout=None):
+        """Attend que la file soit vide ; retourne False si timeout est dépassé"""
+        self._wakeup.set()
+        with self._drained:
+            return self._drained.wait_for(lambda: self.pending() == 0, timeout)
+
+    def stop(self, timeout=None):
+        """Arrête le thread d'écriture ; les présences restantes seront écrites au prochain démarrage"""
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                # Écriture encore en cours : la file reste ouverte, le thread (daemon) s'arrêtera seul
+                return
+            self._thread = None
+        with self._lock:
+            self._outbox.close()
@@ -4,6 +4,11 @@ from tkinter import messagebox
 import sqlite3
 import os
 import sys
+import threading
+from contextlib import contextmanager
+from database.connection_pool import ConnectionPool
+from database.migrations import apply_migrations
+from settings import Settings
 
 class DatabaseConnection:
     def __init__(self, use_local=False):
@@ -19,126 +24,281 @@ class DatabaseConnection:
                 'password': '',
                 'database': 'lycee_melkior'
             }
+        # Réserve de connexions, créée à la première requête
+        self._pool = None
+        self._pool_lock = threading.Lock()
 
-    def connect(self):
+    def get_data_directory(self):
+        # Obtenir le chemin correct pour la base de données locale lors du packaging
+        if getattr(sys, 'frozen', False):
+            return os.path.dirname(sys.executable)
+        return os.path.dirname(os.path.abspath(__file__))
+
+    def _open(self):
+        """Ouvre une nouvelle connexion (sans initialiser le schéma)"""
+        if self.use_local:
+            db_path = os.path.join(self.get_data_directory(), self.config['database'])
+            # La réserve peut confier la connexion à un autre thread (jamais à deux à la fois)
+            connection = sqlite3.connect(db_path, check_same_thread=False)
+            # Activer les clés étrangères (réglage propre à chaque connexion)
+            connection.execute("PRAGMA foreign_keys = ON")
+            return connection
+        connection = mysql.connector.connect(**self.config)
+        if not connection.is_connected():
+            raise Error("MySQL connection failed")
+        return connection
+
+    def _is_alive(self, connection):
+        # Contrôle d'une connexion restée inutilisée dans la réserve
+        if self.use_local:
+            connection.execute("SELECT 1")
+            return True
+        return connection.is_connected()
+
+    def initialize_schema(self, connection):
+        """Crée les tables et les classes par défaut de la base locale, puis applique les migrations"""
+        if self.use_local:
+            self._create_local_tables(connection)
+        apply_migrations(connection, 'sqlite' if self.use_local else 'mysql')
+
+    def _create_local_tables(self, connection):
+        cursor = connection.cursor()
         try:
-            if self.use_local:
-                # Obtenir le chemin correct pour la base de données locale lors du packaging
-                if getattr(sys, 'frozen', False):
-                    application_path = os.path.dirname(sys.executable)
-                else:
-                    application_path = os.path.dirname(os.path.abspath(__file__))
-                
-                db_path = os.path.join(application_path, self.config['database'])
-                connection = sqlite3.connect(db_path)
-                cursor = connection.cursor()
+            # Créer les tables
+            cursor.executescript('''
+                CREATE TABLE IF NOT EXISTS Classe (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    nom_classe TEXT NOT NULL,
+                    niveau TEXT NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS Etudiants (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    prenom TEXT NOT NULL,
+                    nom_famille TEXT NOT NULL,
+                    id_classe INTEGER NOT NULL,
+                    annee_scolaire TEXT NOT NULL,
+                    photo_path TEXT,
+                    FOREIGN KEY (id_classe) REFERENCES Classe(id)
+                );
+
+                CREATE TABLE IF NOT EXISTS FaceFeatures (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    etudiant_id INTEGER NOT NULL,
+                    image_path TEXT NOT NULL UNIQUE,
+                    face_encoding BLOB NOT NULL,
+                    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (etudiant_id) REFERENCES Etudiants(id)
+                );
                 
-                # Activer les clés étrangères
-                cursor.execute("PRAGMA foreign_keys = ON")
+                CREATE TABLE IF NOT EXISTS Presences (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    etudiant_id INTEGER NOT NULL,
+                    date_presence DATE NOT NULL,
+                    heure_presence TIME NOT NULL,
+                    heure_fin TIME,
+                    periode VARCHAR(20) NOT NULL, 
+                    statut VARCHAR(20) NOT NULL,   
+                    FOREIGN KEY (etudiant_id) REFERENCES Etudiants(id)
+                );
                 
-                # Créer les tables
-                cursor.executescript('''
-                    CREATE TABLE IF NOT EXISTS Classe (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        nom_classe TEXT NOT NULL,
-                        niveau TEXT NOT NULL
-                    );
-
-                    CREATE TABLE IF NOT EXISTS Etudiants (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        prenom TEXT NOT NULL,
-                        nom_famille TEXT NOT NULL,
-                        id_classe INTEGER NOT NULL,
-                        annee_scolaire TEXT NOT NULL,
-                        photo_path TEXT,
-                        FOREIGN KEY (id_classe) REFERENCES Classe(id)
-                    );
-
-                    CREATE TABLE IF NOT EXISTS FaceFeatures (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        etudiant_id INTEGER NOT NULL,
-                        image_path TEXT NOT NULL UNIQUE,
-                        face_encoding BLOB NOT NULL,
-                        date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (etudiant_id) REFERENCES Etudiants(id)
-                    );
-                    
-                    CREATE TABLE IF NOT EXISTS Presences (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        etudiant_id INTEGER NOT NULL,
-                        date_presence DATE NOT NULL,
-                        heure_presence TIME NOT NULL,
-                        heure_fin TIME,
-                        periode VARCHAR(20) NOT NULL, 
-                        statut VARCHAR(20) NOT NULL,   
-                        FOREIGN KEY (etudiant_id) REFERENCES Etudiants(id)
-                    );
-                    
+            ''')
+            
+            # Vérifier si la table Classe est vide et insérer les données par défaut
+            cursor.execute("SELECT COUNT(*) FROM Classe")
+            if cursor.fetchone()[0] == 0:
+                cursor.execute('''
+                    INSERT INTO Classe (nom_classe, niveau) VALUES 
+                    ('BTS SIO', '1ere année'),
+                    ('BTS SIO', '2eme année'),
+                    ('Terminale', '2'),
+                    ('BTS Commerce', '1')
                 ''')
-                
-                # Vérifier si la table Classe est vide et insérer les données par défaut
-                cursor.execute("SELECT COUNT(*) FROM Classe")
-                if cursor.fetchone()[0] == 0:
-                    cursor.execute('''
-                        INSERT INTO Classe (nom_classe, niveau) VALUES 
-                        ('BTS SIO', '1ere année'),
-                        ('BTS SIO', '2eme année'),
-                        ('Terminale', '2'),
-                        ('BTS Commerce', '1')
-                    ''')
-                
-                connection.commit()
-                return connection
-            else:
-                connection = mysql.connector.connect(**self.config)
-                if connection.is_connected():
-                    return connection
+            
+            connection.commit()
+        finally:
+            cursor.close()
+
+    def get_pool(self):
+        """Réserve de connexions, créée (et le schéma initialisé) à la première utilisation"""
+        with self._pool_lock:
+            if self._pool is None:
+                pool = ConnectionPool(self._open, Settings.DB_POOL_SIZE, self._is_alive,
+                                      Settings.DB_HEALTH_CHECK_INTERVAL, Settings.DB_POOL_TIMEOUT)
+                connection = pool.acquire()
+                try:
+                    self.initialize_schema(connection)
+                finally:
+                    pool.release(connection)
+                self._pool = pool
+            return self._pool
+
+    def connect(self):
+        """Nouvelle connexion hors réserve, à fermer par l'appelant"""
+        try:
+            self.get_pool()
+            return self._open()
         except Exception as e:
             messagebox.showerror("Erreur de Connexion", f"Erreur: {e}")
             return None
 
+    def adapt_query(self, query):
+        """Adapte une requête écrite pour MySQL au moteur utilisé"""
+        if self.use_local:
+            # Remplacer MySQL LAST_INSERT_ID() par SQLite last_insert_rowid()
+            query = query.replace('LAST_INSERT_ID()', 'last_insert_rowid()')
+            # Remplacer % par ? pour la paramétrisation SQLite
+            query = query.replace('%s', '?')
+        return query
+
+    def _acquire(self):
+        # (réserve, connexion empruntée)
+        try:
+            pool = self.get_pool()
+            return pool, pool.acquire()
+        except Exception as e:
+            raise ConnectionError(f"Database connection failed: {e}") from e
+
+    @contextmanager
+    def transaction(self):
+        """Une connexion et un curseur pour plusieurs requêtes (voir Transaction).
+
+        Les requêtes sont validées ensemble à la fin du bloc with, ou annulées si
+        le bloc lève une exception (qui est propagée).
+        """
+        pool, connection = self._acquire()
+        transaction = Transaction(self, connection)
+        discard = False
+        try:
+            yield transaction
+            connection.commit()
+        except BaseException:
+            # Une connexion qui ne répond plus n'est pas rendue à la réserve
+            discard = not self._rollback(connection)
+            raise
+        finally:
+            transaction.close()
+            pool.release(connection, discard)
+
     def execute_query(self, query, params=None):
-        connection = self.connect()
-        cursor = None
-        if connection:
-            try:
-                cursor = connection.cursor()
-                
-                # Adapter la requête pour SQLite si utilisation de la base de données locale
-                if self.use_local:
-                    # Remplacer MySQL LAST_INSERT_ID() par SQLite last_insert_rowid()
-                    query = query.replace('LAST_INSERT_ID()', 'last_insert_rowid()')
-                    # Remplacer % par ? pour la paramétrisation SQLite
-                    query = query.replace('%s', '?')
-                
-                if params:
-                    cursor.execute(query, params)
-                else:
-                    cursor.execute(query)
-                
-                result = cursor.fetchall() if cursor.description else None
-                
-                # Pour les requêtes INSERT, retourner le dernier ID inséré
-                if query.strip().upper().startswith('INSERT'):
-                    if self.use_local:
-                        result = [(cursor.lastrowid,)]
-                    else:
-                        cursor.execute("SELECT LAST_INSERT_ID()")
-                        result = cursor.fetchall()
-                
-                connection.commit()
-                return result
-            except Exception as e:
-                messagebox.showerror("Erreur de Requête", f"Erreur: {e}")
-                return None
-            finally:
-                if cursor:
-                    cursor.close()
-                connection.close()
+        """Exécute une requête dans sa propre transaction ; None (et message d'erreur) en cas d'échec"""
+        try:
+            with self.transaction() as transaction:
+                return transaction.execute(query, params)
+        except ConnectionError as e:
+            messagebox.showerror("Erreur de Connexion", f"Erreur: {e}")
+        except Exception as e:
+            messagebox.showerror("Erreur de Requête", f"Erreur: {e}")
+        return None
+
+    def execute_many(self, query, params_seq):
+        """Exécute une requête pour chaque jeu de paramètres, en une transaction ; retourne le nombre de lignes"""
+        try:
+            with self.transaction() as transaction:
+                return transaction.execute_many(query, params_seq)
+        except ConnectionError as e:
+            messagebox.showerror("Erreur de Connexion", f"Erreur: {e}")
+        except Exception as e:
+            messagebox.showerror("Erreur de Requête", f"Erreur: {e}")
         return None
 
+    def fetch_iter(self, query, params=None, batch_size=None):
+        """Parcourt les lignes d'un SELECT par lots de batch_size, sans les charger toutes.
+
+        La connexion reste empruntée jusqu'à la fin du parcours ; les erreurs sont
+        propagées à l'appelant.
+        """
+        with self.transaction() as transaction:
+            yield from transaction.fetch_iter(query, params, batch_size)
+
+    def upsert_clause(self, key_columns, update_columns):
+        """Fin d'un INSERT qui met à jour la ligne existante en cas de conflit sur la clé unique key_columns"""
+        if self.use_local:
+            updates = ', '.join(f"{column} = excluded.{column}" for column in update_columns)
+            return f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {updates}"
+        updates = ', '.join(f"{column} = VALUES({column})" for column in update_columns)
+        return f"ON DUPLICATE KEY UPDATE {updates}"
+
+    def _rollback(self, connection):
+        # Annule la transaction en cours ; retourne False si la connexion est perdue
+        try:
+            connection.rollback()
+            return self._is_alive(connection)
+        except Exception:
+            return False
+
+    def close(self):
+        """Ferme les connexions de la réserve"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+
     def test_connection(self):
         connection = self.connect()
         if connection:
             messagebox.showinfo("Succès", "Connexion à la base de données réussie !")
-            connection.close()
\ No newline at end of file
+            connection.close()
+
+
+class Transaction:
+    """Requêtes exécutées sur une même connexion (voir DatabaseConnection.transaction)"""
+
+    def __init__(self, db, connection):
+        self.db = db
+        self.connection = connection
+        self.cursor = connection.cursor()
+
+    def execute(self, query, params=None):
+        """Exécute une requête ; retourne ses lignes, [(id inséré,)] pour un INSERT, ou None"""
+        query = self.db.adapt_query(query)
+        if params:
+            self.cursor.execute(query, params)
+        else:
+            self.cursor.execute(query)
+        
+        result = self.cursor.fetchall() if self.cursor.description else None
+        
+        # Pour les requêtes INSERT, retourner le dernier ID inséré
+        if query.strip().upper().startswith('INSERT'):
+            if self.db.use_local:
+                result = [(self.cursor.lastrowid,)]
+            else:
+                self.cursor.execute("SELECT LAST_INSERT_ID()")
+                result = self.cursor.fetchall()
+        return result
+
+    def execute_many(self, query, params_seq):
+        """Exécute une requête pour chaque jeu de paramètres ; retourne le nombre de lignes modifiées"""
+        self.cursor.executemany(self.db.adapt_query(query), list(params_seq))
+        return self.cursor.rowcount
+
+    def fetch_iter(self, query, params=None, batch_size=None):
+        """Parcourt les lignes d'un SELECT, lues par lots avec fetchmany"""
+        batch_size = batch_size or Settings.DB_FETCH_BATCH_SIZE
+        # Curseur dédié : self.cursor reste utilisable après le parcours
+        cursor = self.connection.cursor()
+        exhausted = False
+        try:
+            query = self.db.adapt_query(query)
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    exhausted = True
+                    return
+                yield from rows
+        finally:
+            # MySQL refuse de fermer un curseur dont toutes les lignes n'ont pas été lues
+            if not exhausted and not self.db.use_local:
+                try:
+                    cursor.fetchall()
+                except Exception:
+                    pass
+            cursor.close()
+
+    def close(self):
+        self.cursor.close()
@@ -0,0 +1,102 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """Réserve de connexions réutilisées entre les requêtes.
+
+    Au plus size connexions sont ouvertes ; acquire() attend qu'une connexion se
+    libère (timeout secondes au plus). Une connexion restée inutilisée plus de
+    health_check_interval secondes est vérifiée par health_check(connexion) avant
+    d'être rendue, et remplacée si elle ne répond plus. Utilisable depuis plusieurs
+    threads, chaque connexion n'étant confiée qu'à un seul à la fois.
+    """
+
+    def __init__(self, factory, size=4, health_check=None, health_check_interval=30.0, timeout=5.0):
+        # factory() -> nouvelle connexion ouverte
+        self.factory = factory
+        self.size = size
+        self.health_check = health_check
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        # Connexions libres avec l'heure de leur dernière utilisation ; la plus récente sort la première
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+        # Compteurs : connexions ouvertes et connexions remplacées après un échec du contrôle
+        self.connections_opened = 0
+        self.connections_replaced = 0
+
+    def acquire(self, timeout=None):
+        """Retourne une connexion en état de marche, à rendre avec release()"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        timeout = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No database connection available after {timeout} s (pool size {self.size})")
+        try:
+            while True:
+                try:
+                    connection, released_at = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if self._is_healthy(connection, released_at):
+                    return connection
+                self._close(connection)
+                self.connections_replaced += 1
+            connection = self.factory()
+            self.connections_opened += 1
+            return connection
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, connection, discard=False):
+        """Rend une connexion ; discard : elle est fermée au lieu d'être réutilisée"""
+        if discard or self._closed:
+            self._close(connection)
+        else:
+            self._idle.put((connection, time.monotonic()))
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Connexion empruntée le temps d'un bloc with (fermée si le bloc échoue)"""
+        connection = self.acquire()
+        failed = True
+        try:
+            yield connection
+            failed = False
+        finally:
+            # Rendue dans tous les cas, y compris sur KeyboardInterrupt ou GeneratorExit
+            self.release(connection, discard=failed and not self._is_healthy(connection, None))
+
+    def _is_healthy(self, connection, released_at):
+        # released_at None : contrôle immédiat (après une erreur)
+        if self.health_check is None:
+            return True
+        if released_at is not None and time.monotonic() - released_at < self.health_check_interval:
+            return True
+        try:
+            return bool(self.health_check(connection))
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Ferme les connexions libres ; celles encore empruntées le seront à leur retour"""
+        self._closed = True
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(connection)
@@ -0,0 +1,56 @@
+"""Convertit les anciens encodages pickle de FaceFeatures vers le format binaire.
+
+Usage : python -m database.migrate_encodings [--mysql] [--batch-size N]
+"""
+import argparse
+from database.connection import DatabaseConnection
+from src.face_encoding import decode_features, encode_features, is_legacy
+
+
+def migrate_encodings(db, batch_size=500):
+    """Réécrit les encodages pickle par lots et retourne le nombre de lignes converties"""
+    select_query = "SELECT id, face_encoding FROM FaceFeatures WHERE id > %s ORDER BY id LIMIT %s"
+    update_query = "UPDATE FaceFeatures SET face_encoding = %s WHERE id = %s"
+
+    migrated = 0
+    last_id = 0
+    while True:
+        # Une transaction par lot pour pouvoir reprendre la migration en cas d'interruption
+        with db.transaction() as transaction:
+            rows = transaction.execute(select_query, (last_id, batch_size))
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            updates = []
+            for row_id, blob in rows:
+                if not is_legacy(blob):
+                    continue
+                try:
+                    features, extractor = decode_features(blob)
+                except Exception as e:
+                    print(f"Encodage illisible ignoré (FaceFeatures.id={row_id}): {e}")
+                    continue
+                updates.append((encode_features(features, extractor), row_id))
+
+            if updates:
+                transaction.execute_many(update_query, updates)
+                migrated += len(updates)
+        print(f"{migrated} encodage(s) converti(s), dernier id traité : {last_id}")
+
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migration des encodages de visages vers le format binaire")
+    parser.add_argument('--mysql', action='store_true', help="Utiliser la base MySQL au lieu de local.db")
+    parser.add_argument('--batch-size', type=int, default=500, help="Nombre de lignes traitées par lot")
+    args = parser.parse_args()
+
+    db = DatabaseConnection(use_local=not args.mysql)
+    migrated = migrate_encodings(db, args.batch_size)
+    print(f"Migration terminée : {migrated} encodage(s) converti(s)")
+
+
+if __name__ == "__main__":
+    main()
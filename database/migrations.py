@@ -0,0 +1,226 @@
+"""Migrations versionnées du schéma (SQLite et MySQL) et contrôle des plans de requête.
+
+Les migrations sont appliquées automatiquement à la première connexion
+(DatabaseConnection.initialize_schema) ; ce module peut aussi être lancé seul.
+
+Usage : python -m database.migrations [--mysql] [--check-plans]
+"""
+import argparse
+import re
+import sys
+
+SCHEMA_VERSION_TABLE = {
+    'sqlite': """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    'mysql': """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+}
+
+# (version, description, instructions par moteur), dans l'ordre d'application.
+# Une migration déjà publiée ne doit plus être modifiée : ajouter une nouvelle version.
+MIGRATIONS = [
+    (1, "Index des requêtes fréquentes", {
+        'sqlite': [
+            "CREATE INDEX IF NOT EXISTS idx_facefeatures_etudiant ON FaceFeatures (etudiant_id)",
+            "CREATE INDEX IF NOT EXISTS idx_etudiants_identite ON Etudiants (nom_famille, prenom, id_classe)",
+            "CREATE INDEX IF NOT EXISTS idx_classe_nom ON Classe (nom_classe)",
+            "CREATE INDEX IF NOT EXISTS idx_presences_date ON Presences (date_presence)",
+        ],
+        'mysql': [
+            "CREATE INDEX idx_facefeatures_etudiant ON FaceFeatures (etudiant_id)",
+            "CREATE INDEX idx_etudiants_identite ON Etudiants (nom_famille, prenom, id_classe)",
+            "CREATE INDEX idx_classe_nom ON Classe (nom_classe)",
+            "CREATE INDEX idx_presences_date ON Presences (date_presence)",
+        ],
+    }),
+    # Une seule présence par étudiant, jour et période (la plus récente est conservée) ;
+    # sert aussi aux recherches par (etudiant_id, date_presence)
+    (2, "Clé unique de présence", {
+        'sqlite': [
+            """DELETE FROM Presences WHERE id NOT IN (
+                   SELECT MAX(id) FROM Presences GROUP BY etudiant_id, date_presence, periode)""",
+            """CREATE UNIQUE INDEX IF NOT EXISTS uq_presences_etudiant_date_periode
+                   ON Presences (etudiant_id, date_presence, periode)""",
+        ],
+        'mysql': [
+            """DELETE p FROM Presences p
+                   JOIN Presences q ON q.etudiant_id = p.etudiant_id AND q.date_presence = p.date_presence
+                                   AND q.periode = p.periode AND q.id > p.id""",
+            """CREATE UNIQUE INDEX uq_presences_etudiant_date_periode
+                   ON Presences (etudiant_id, date_presence, periode)""",
+        ],
+    }),
+]
+
+# Verrou nommé MySQL pris pendant les migrations (plusieurs postes peuvent démarrer ensemble)
+MYSQL_LOCK_NAME = 'eduface_schema'
+MYSQL_LOCK_TIMEOUT = 60
+
+CREATE_INDEX = re.compile(r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+(\w+)\s+ON\s+(\w+)", re.IGNORECASE)
+
+# Requêtes fréquentes de l'application qui doivent utiliser un index : (nom, requête, paramètres)
+HOT_QUERIES = [
+    ("présence d'un étudiant un jour donné",
+     "SELECT statut FROM Presences WHERE etudiant_id = %s AND date_presence = %s",
+     (1, '2024-01-01')),
+    ("encodages d'un étudiant",
+     "SELECT f.id FROM Etudiants e JOIN FaceFeatures f ON e.id = f.etudiant_id WHERE e.id = %s",
+     (1,)),
+    ("étudiant par nom, prénom et classe (mark_student_present)",
+     "SELECT id FROM Etudiants WHERE nom_famille = %s AND prenom = %s AND id_classe = %s",
+     ('Nom', 'Prenom', 1)),
+    ("classe par nom (get_class_id)",
+     "SELECT id FROM Classe WHERE nom_classe = %s",
+     ('BTS SIO',)),
+    ("présences du jour (update_presence_status)",
+     "SELECT id FROM Presences WHERE date_presence = %s AND statut IN ('Présent', 'Retard')",
+     ('2024-01-01',)),
+]
+
+
+def _dialect(db):
+    return 'sqlite' if db.use_local else 'mysql'
+
+
+def _placeholder(dialect, query):
+    return query.replace('%s', '?') if dialect == 'sqlite' else query
+
+
+def current_version(cursor):
+    cursor.execute("SELECT MAX(version) FROM schema_version")
+    row = cursor.fetchone()
+    return (row[0] or 0) if row else 0
+
+
+def _index_exists(cursor, statement):
+    # Index MySQL déjà créé par une migration interrompue
+    match = CREATE_INDEX.match(statement.strip())
+    if match is None:
+        return False
+    cursor.execute("""SELECT 1 FROM information_schema.STATISTICS
+                      WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+                      LIMIT 1""", (match.group(2), match.group(1)))
+    return cursor.fetchone() is not None
+
+
+def _acquire_mysql_lock(connection, cursor):
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (MYSQL_LOCK_NAME, MYSQL_LOCK_TIMEOUT))
+    if cursor.fetchone()[0] != 1:
+        raise RuntimeError(f"Could not acquire schema lock '{MYSQL_LOCK_NAME}' "
+                           f"after {MYSQL_LOCK_TIMEOUT} s")
+    # Nouvelle transaction : la version est relue après la prise du verrou
+    connection.commit()
+
+
+def apply_migrations(connection, dialect):
+    """Applique les migrations manquantes ; retourne les versions appliquées.
+
+    Plusieurs postes pouvant démarrer ensemble, la version est relue sous verrou :
+    sous SQLite chaque migration est appliquée dans une transaction ouverte par
+    BEGIN IMMEDIATE, sous MySQL toutes le sont sous le verrou nommé
+    MYSQL_LOCK_NAME. MySQL validant implicitement chaque CREATE INDEX, une
+    migration interrompue est reprise en sautant les index déjà présents.
+    """
+    cursor = connection.cursor()
+    locked = False
+    try:
+        cursor.execute(SCHEMA_VERSION_TABLE[dialect])
+        connection.commit()
+        if dialect == 'mysql':
+            _acquire_mysql_lock(connection, cursor)
+            locked = True
+        applied = []
+        for version, description, statements in MIGRATIONS:
+            if dialect == 'sqlite':
+                cursor.execute("BEGIN IMMEDIATE")
+            if current_version(cursor) >= version:
+                connection.rollback()
+                continue
+            try:
+                for statement in statements[dialect]:
+                    if dialect == 'mysql' and _index_exists(cursor, statement):
+                        continue
+                    cursor.execute(statement)
+                cursor.execute(_placeholder(dialect, "INSERT INTO schema_version (version, description) VALUES (%s, %s)"),
+                               (version, description))
+                connection.commit()
+            except Exception as e:
+                connection.rollback()
+                raise RuntimeError(f"Schema migration {version} ({description}) failed: {e}") from e
+            applied.append(version)
+        return applied
+    finally:
+        if locked:
+            try:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (MYSQL_LOCK_NAME,))
+                cursor.fetchone()
+            except Exception:
+                # Connexion perdue : le serveur libère le verrou avec la session
+                pass
+        cursor.close()
+
+
+def _is_full_scan(dialect, cursor, rows):
+    if dialect == 'sqlite':
+        # Lignes (id, parent, notused, detail) : "SCAN t" sans index = parcours complet
+        return [row[3] for row in rows if row[3].startswith('SCAN') and 'INDEX' not in row[3]]
+    columns = [column[0] for column in cursor.description]
+    table, access = columns.index('table'), columns.index('type')
+    return [f"{row[table]} (type={row[access]})" for row in rows if row[access] == 'ALL']
+
+
+def check_query_plans(db, queries=None):
+    """Retourne les requêtes fréquentes qui parcourent une table entière : [(nom, détail)]"""
+    dialect = _dialect(db)
+    prefix = "EXPLAIN QUERY PLAN " if dialect == 'sqlite' else "EXPLAIN "
+    failures = []
+    with db.get_pool().connection() as connection:
+        cursor = connection.cursor()
+        try:
+            for name, query, params in queries or HOT_QUERIES:
+                cursor.execute(_placeholder(dialect, prefix + query), params)
+                scans = _is_full_scan(dialect, cursor, cursor.fetchall())
+                if scans:
+                    failures.append((name, ', '.join(scans)))
+        finally:
+            cursor.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrations du schéma de la base de données")
+    parser.add_argument('--mysql', action='store_true', help="Utiliser la base MySQL au lieu de local.db")
+    parser.add_argument('--check-plans', action='store_true',
+                        help="Échoue si une requête fréquente parcourt une table entière")
+    args = parser.parse_args()
+
+    from database.connection import DatabaseConnection
+    db = DatabaseConnection(use_local=not args.mysql)
+    # Les migrations sont appliquées à la création de la réserve de connexions
+    with db.get_pool().connection() as connection:
+        cursor = connection.cursor()
+        print(f"Schéma à jour : version {current_version(cursor)}")
+        cursor.close()
+
+    if args.check_plans:
+        failures = check_query_plans(db)
+        for name, detail in failures:
+            print(f"Parcours complet : {name} -> {detail}")
+        print(f"{len(HOT_QUERIES) - len(failures)}/{len(HOT_QUERIES)} requête(s) fréquente(s) indexée(s)")
+        db.close()
+        sys.exit(1 if failures else 0)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from database.connection import DatabaseConnection
 from src.image_processor import ImageProcessor
 from database.face_database import FaceDatabase
+from src.face_gallery import FaceGallery
 from ui.ui_manager import UIManager
 from tkinter import messagebox
 
@@ -15,7 +16,8 @@ def main():
         # Initialisation de la base de données et du gestionnaire d'interface utilisateur
         db = DatabaseConnection(use_local=use_local)
         image_processor = ImageProcessor()
-        face_db = FaceDatabase(db)
+        gallery = FaceGallery(db, image_processor)
+        face_db = FaceDatabase(db, gallery)
         
         # Démarrage de l'application avec le gestionnaire d'interface utilisateur
         app = UIManager(db, image_processor, face_db)
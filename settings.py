@@ -0,0 +1,166 @@
+import os
+
+# Les valeurs peuvent être surchargées par des variables d'environnement EDUFACE_<NOM>,
+# éventuellement définies dans un fichier .env (python-dotenv)
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+
+# Modèles entraînés ou téléchargés (non versionnés)
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'models')
+
+
+def _env(name, default):
+    value = os.environ.get(f"EDUFACE_{name}")
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value.strip().lower() in ('1', 'true', 'yes', 'oui', 'on')
+    return type(default)(value)
+
+
+class Settings:
+    # Extracteur de caractéristiques : 'raw' (pixels 128x128, projetés si un modèle existe)
+    # ou 'lbp' (histogrammes de motifs binaires locaux uniformes)
+    FACE_EXTRACTOR = _env('FACE_EXTRACTOR', 'raw')
+    # Grille de cellules de l'extracteur LBP (lignes, colonnes)
+    LBP_GRID = (_env('LBP_GRID_ROWS', 4), _env('LBP_GRID_COLS', 4))
+    # Mesure de similarité des histogrammes LBP : 'chi2' ou 'intersection'
+    LBP_METRIC = _env('LBP_METRIC', 'chi2')
+
+    # Confiance minimale par mesure de similarité : marquage de présence en direct et
+    # identification par le bouton de capture. Les scores ne sont pas comparables d'une
+    # mesure à l'autre : entre visages d'élèves différents, chi2 donne une médiane de 83
+    # (9 % des paires au-dessus de 90), intersection 70 et cosinus 41
+    RECOGNITION_THRESHOLDS = {
+        'cosine': _env('RECOGNITION_THRESHOLD_COSINE', 90.0),
+        'chi2': _env('RECOGNITION_THRESHOLD_CHI2', 98.0),
+        'intersection': _env('RECOGNITION_THRESHOLD_INTERSECTION', 90.0),
+    }
+    CAPTURE_THRESHOLDS = {
+        'cosine': _env('CAPTURE_THRESHOLD_COSINE', 60.0),
+        'chi2': _env('CAPTURE_THRESHOLD_CHI2', 89.0),
+        'intersection': _env('CAPTURE_THRESHOLD_INTERSECTION', 78.0),
+    }
+
+    # Modèles comparés à chaque image : 'image' (toutes les images), 'mean' (un modèle
+    # moyen par étudiant) ou 'medoids' (au plus GALLERY_MEDOIDS images par étudiant)
+    GALLERY_TEMPLATES = _env('GALLERY_TEMPLATES', 'image')
+    GALLERY_MEDOIDS = _env('GALLERY_MEDOIDS', 3)
+
+    # Index approximatif (IVF) utilisé à partir de cette taille de galerie
+    ANN_MIN_GALLERY = _env('ANN_MIN_GALLERY', 2000)
+    # Nombre de listes inversées (0 : racine carrée du nombre de modèles)
+    ANN_LISTS = _env('ANN_LISTS', 0)
+    # Nombre de listes parcourues par recherche (voir `python benchmark.py ann`)
+    ANN_NPROBE = _env('ANN_NPROBE', 8)
+    # Sous-vecteurs de la quantification produit des résidus (0 : désactivée)
+    ANN_PQ_SUBVECTORS = _env('ANN_PQ_SUBVECTORS', 0)
+    # Nombre de candidats re-classés avec le score exact après la quantification produit
+    ANN_RERANK = _env('ANN_RERANK', 64)
+
+    # Galerie quantifiée en int8 : seuls les codes entiers (8 fois plus compacts que float64)
+    # restent en mémoire privée ; les QUANTIZED_RERANK meilleurs scores approchés sont
+    # re-classés avec les vecteurs exacts lus dans l'instantané disque projeté en mémoire
+    # (voir `python benchmark.py quantized`)
+    GALLERY_QUANTIZED = _env('GALLERY_QUANTIZED', False)
+    QUANTIZED_RERANK = _env('QUANTIZED_RERANK', 32)
+
+    # Détecteur de visages : 'haar', 'lbp' (cascade lbpcascade_frontalface_improved.xml à
+    # placer dans src/cascades) ou 'dnn' (réseau SSD chargé par cv2.dnn depuis DNN_MODEL et
+    # DNN_CONFIG) ; voir `python benchmark.py detectors`
+    FACE_DETECTOR = _env('FACE_DETECTOR', 'haar')
+    DNN_MODEL = _env('DNN_MODEL', os.path.join(MODELS_DIR, 'res10_300x300_ssd_iter_140000.caffemodel'))
+    DNN_CONFIG = _env('DNN_CONFIG', os.path.join(MODELS_DIR, 'deploy.prototxt'))
+    DNN_CONFIDENCE = _env('DNN_CONFIDENCE', 0.6)
+    DNN_INPUT_SIZE = _env('DNN_INPUT_SIZE', 300)
+
+    # Suivi des visages entre deux détections : le détecteur ne tourne que toutes les
+    # TRACK_REDETECT_INTERVAL images (0 ou 1 : à chaque image), ou dès que le score de
+    # corrélation d'un visage suivi passe sous TRACK_MIN_SCORE (voir `python benchmark.py tracking`)
+    TRACK_REDETECT_INTERVAL = _env('TRACK_REDETECT_INTERVAL', 5)
+    TRACK_MIN_SCORE = _env('TRACK_MIN_SCORE', 0.6)
+    # Marge de la zone de recherche autour du visage précédent (fraction de sa taille)
+    TRACK_SEARCH_MARGIN = _env('TRACK_SEARCH_MARGIN', 0.5)
+
+    # Vote sur l'identité d'un visage suivi : l'étudiant n'est marqué présent que s'il est
+    # reconnu au seuil dans VOTE_MIN_AGREEMENT des VOTE_WINDOW dernières images ; l'identité
+    # est ensuite conservée sans nouvelle recherche jusqu'à la perte du suivi
+    VOTE_WINDOW = _env('VOTE_WINDOW', 5)
+    VOTE_MIN_AGREEMENT = _env('VOTE_MIN_AGREEMENT', 3)
+
+    # Filtre de mouvement devant la détection (voir src/motion_gate.py) : image réduite à
+    # MOTION_WIDTH pixels, écart de niveau de gris MOTION_THRESHOLD sur au moins
+    # MOTION_MIN_AREA de l'image, fond mis à jour au taux MOTION_LEARNING_RATE et détection
+    # forcée après MOTION_MAX_IDLE images analysées sans mouvement (0 : jamais)
+    MOTION_GATE = _env('MOTION_GATE', True)
+    MOTION_WIDTH = _env('MOTION_WIDTH', 64)
+    MOTION_THRESHOLD = _env('MOTION_THRESHOLD', 15)
+    MOTION_MIN_AREA = _env('MOTION_MIN_AREA', 0.005)
+    MOTION_LEARNING_RATE = _env('MOTION_LEARNING_RATE', 0.05)
+    MOTION_MAX_IDLE = _env('MOTION_MAX_IDLE', 30)
+
+    # Détection sur le flux caméra : image réduite à DETECT_WIDTH pixels de large (0 : pleine
+    # résolution), recherche d'abord autour des visages connus (marge DETECT_ROI_MARGIN) et
+    # image entière au moins une détection sur DETECT_FULL_FRAME_EVERY
+    DETECT_WIDTH = _env('DETECT_WIDTH', 320)
+    DETECT_ROI_MARGIN = _env('DETECT_ROI_MARGIN', 0.5)
+    DETECT_FULL_FRAME_EVERY = _env('DETECT_FULL_FRAME_EVERY', 3)
+    # Géométrie de la borne, pour borner la taille des visages recherchés : distances
+    # minimale et maximale (m) entre l'élève et la caméra, champ horizontal (degrés)
+    # et largeur moyenne d'un visage (m)
+    KIOSK_MIN_DISTANCE = _env('KIOSK_MIN_DISTANCE', 0.3)
+    KIOSK_MAX_DISTANCE = _env('KIOSK_MAX_DISTANCE', 1.5)
+    CAMERA_HFOV = _env('CAMERA_HFOV', 60.0)
+    FACE_WIDTH = _env('FACE_WIDTH', 0.16)
+
+    # Capture vidéo (lue dans un thread dédié) : numéro de caméra ou chemin d'un fichier
+    # vidéo, résolution demandée (0 : celle du pilote), format des images (par exemple
+    # 'MJPG', plus léger sur USB ; vide : celui du pilote) et nombre d'images en attente
+    # dans le pilote
+    CAMERA_SOURCE = _env('CAMERA_SOURCE', '0')
+    CAMERA_WIDTH = _env('CAMERA_WIDTH', 0)
+    CAMERA_HEIGHT = _env('CAMERA_HEIGHT', 0)
+    CAMERA_FOURCC = _env('CAMERA_FOURCC', '')
+    CAMERA_BUFFER_SIZE = _env('CAMERA_BUFFER_SIZE', 1)
+    # Taille du tampon circulaire d'images et attente maximale d'une nouvelle image (s)
+    FRAME_RING_SIZE = _env('FRAME_RING_SIZE', 3)
+    CAMERA_READ_TIMEOUT = _env('CAMERA_READ_TIMEOUT', 1.0)
+
+    # Cadencement de la boucle caméra (voir src/frame_scheduler.py) : profil 'normal' ou
+    # 'low_power' (portables sur batterie), cadences visées de reconnaissance et d'aperçu
+    # et part d'un cœur allouée (0 : valeurs du profil), cadences minimales en cas de
+    # surcharge et pause (ms) avant de réessayer quand aucune nouvelle image n'est prête
+    POWER_PROFILE = _env('POWER_PROFILE', 'normal')
+    RECOGNITION_FPS = _env('RECOGNITION_FPS', 0.0)
+    PREVIEW_FPS = _env('PREVIEW_FPS', 0.0)
+    CPU_BUDGET = _env('CPU_BUDGET', 0.0)
+    MIN_RECOGNITION_FPS = _env('MIN_RECOGNITION_FPS', 1.0)
+    MIN_PREVIEW_FPS = _env('MIN_PREVIEW_FPS', 5.0)
+    FRAME_RETRY_MS = _env('FRAME_RETRY_MS', 5)
+
+    # Exécution de la reconnaissance hors de la boucle Tk : 'thread' (OpenCV et NumPy
+    # libèrent le GIL pendant les calculs) ou 'process' (processus séparé, qui ouvre
+    # sa propre galerie)
+    RECOGNITION_EXECUTOR = _env('RECOGNITION_EXECUTOR', 'thread')
+
+    # Réserve de connexions à la base (voir database/connection_pool.py) : nombre maximal
+    # de connexions ouvertes, attente maximale d'une connexion libre (s) et inactivité (s)
+    # au-delà de laquelle une connexion est vérifiée avant d'être réutilisée
+    DB_POOL_SIZE = _env('DB_POOL_SIZE', 4)
+    DB_POOL_TIMEOUT = _env('DB_POOL_TIMEOUT', 5.0)
+    DB_HEALTH_CHECK_INTERVAL = _env('DB_HEALTH_CHECK_INTERVAL', 30.0)
+    # Lignes lues par lot par DatabaseConnection.fetch_iter
+    DB_FETCH_BATCH_SIZE = _env('DB_FETCH_BATCH_SIZE', 500)
+
+    # Écriture différée des présences (voir database/attendance_queue.py) : présences
+    # écrites par lot, délai initial et maximal (s) avant de réessayer quand la base est
+    # indisponible, attente maximale (s) de l'écriture des présences en file avant le
+    # calcul des absents et à la fermeture
+    ATTENDANCE_BATCH_SIZE = _env('ATTENDANCE_BATCH_SIZE', 50)
+    ATTENDANCE_RETRY_DELAY = _env('ATTENDANCE_RETRY_DELAY', 1.0)
+    ATTENDANCE_MAX_RETRY_DELAY = _env('ATTENDANCE_MAX_RETRY_DELAY', 60.0)
+    ATTENDANCE_FLUSH_TIMEOUT = _env('ATTENDANCE_FLUSH_TIMEOUT', 5.0)
@@ -0,0 +1,179 @@
+import numpy as np
+from src import face_matcher
+
+# Nombre maximal de points utilisés pour entraîner les k-means (par centre)
+TRAINING_POINTS_PER_CENTROID = 256
+# Nombre de lignes traitées à la fois lors de l'affectation aux centres
+ASSIGN_CHUNK = 4096
+
+
+def assign(vectors, centroids, spherical=True):
+    """Indice du centre le plus proche de chaque vecteur"""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    # Pour la distance euclidienne : argmin |x - c|² = argmax (x.c - |c|²/2)
+    offset = 0 if spherical else 0.5 * np.einsum('ij,ij->i', centroids, centroids)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        scores = vectors[start:start + ASSIGN_CHUNK] @ centroids.T - offset
+        assignments[start:start + ASSIGN_CHUNK] = np.argmax(scores, axis=1)
+    return assignments
+
+
+def kmeans(vectors, k, iterations=10, spherical=True, seed=0):
+    """k-means (sphérique pour des vecteurs de norme 1), entièrement en NumPy"""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(vectors))
+    if len(vectors) > k * TRAINING_POINTS_PER_CENTROID:
+        vectors = vectors[rng.choice(len(vectors), k * TRAINING_POINTS_PER_CENTROID, replace=False)]
+
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = assign(vectors, centroids, spherical)
+        # Sommes par groupe sans boucle Python : tri puis réduction par segments
+        order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=k)
+        present = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[present]
+        sums = np.zeros_like(centroids)
+        sums[present] = np.add.reduceat(vectors[order], starts, axis=0)
+
+        # Les centres vides sont réinitialisés sur des points tirés au hasard
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), empty.sum())]
+            counts[empty] = 1
+        if spherical:
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+        else:
+            centroids = sums / counts[:, None]
+    return centroids
+
+
+class IVFIndex:
+    """Index IVF : quantificateur grossier k-means, listes inversées et résidus PQ optionnels.
+
+    La liste courte de candidats est toujours re-classée avec le score exact de face_matcher.
+    """
+
+    def __init__(self, metric='cosine', n_lists=0, nprobe=8, pq_subvectors=0, rerank=64):
+        self.metric = metric
+        # 0 : nombre de listes choisi automatiquement (racine du nombre de modèles)
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        # 0 : pas de quantification produit, tous les candidats des listes sont re-classés
+        self.pq_subvectors = pq_subvectors
+        self.rerank = rerank
+        self.centroids = None
+        self.assignments = np.empty(0, dtype=np.int64)
+        self.lists = []
+        self.codebooks = []
+        self.codes = None
+
+    def __len__(self):
+        return len(self.assignments)
+
+    @property
+    def params(self):
+        return [self.metric, self.n_lists, self.pq_subvectors]
+
+    def build(self, prepared):
+        vectors = prepared.unit_vectors().astype(np.float32)
+        k = self.n_lists or int(round(np.sqrt(len(vectors))))
+        self.centroids = kmeans(vectors, max(k, 1))
+        self.assignments = assign(vectors, self.centroids)
+        self._build_lists()
+
+        self.codebooks = []
+        self.codes = None
+        if self.pq_subvectors:
+            residuals = vectors - self.centroids[self.assignments]
+            self.codebooks = [kmeans(part, 256, spherical=False)
+                              for part in self._split(residuals)]
+            self.codes = self._encode(residuals)
+        return self
+
+    def add(self, prepared_rows):
+        """Ajoute de nouveaux modèles (à la suite des précédents) sans reconstruire l'index"""
+        vectors = prepared_rows.unit_vectors().astype(np.float32)
+        start = len(self.assignments)
+        assignments = assign(vectors, self.centroids)
+        self.assignments = np.concatenate([self.assignments, assignments])
+        for list_id in np.unique(assignments):
+            added = start + np.flatnonzero(assignments == list_id)
+            self.lists[list_id] = np.concatenate([self.lists[list_id], added])
+        if self.codes is not None:
+            residuals = vectors - self.centroids[assignments]
+            self.codes = np.concatenate([self.codes, self._encode(residuals)])
+
+    def update(self, rows, prepared_rows):
+        """Réaffecte des modèles existants dont le vecteur a changé"""
+        vectors = prepared_rows.unit_vectors().astype(np.float32)
+        assignments = assign(vectors, self.centroids)
+        for row, old, new in zip(rows, self.assignments[rows], assignments):
+            if old != new:
+                self.lists[old] = self.lists[old][self.lists[old] != row]
+                self.lists[new] = np.append(self.lists[new], row)
+        self.assignments = self.assignments.copy()
+        self.assignments[rows] = assignments
+        if self.codes is not None:
+            self.codes = self.codes.copy()
+            self.codes[rows] = self._encode(vectors - self.centroids[assignments])
+
+    def search(self, query, prepared, nprobe=None):
+        """Retourne (best_index, confiance) en ne parcourant que les listes les plus proches"""
+        unit = face_matcher.unit_query(query, self.metric)
+        if unit is None or self.centroids is None:
+            return None, 0
+
+        coarse = self.centroids @ unit
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        probed = np.argpartition(-coarse, nprobe - 1)[:nprobe]
+        candidates = np.concatenate([self.lists[list_id] for list_id in probed])
+
+        # Pré-sélection par distance asymétrique sur les résidus quantifiés
+        if self.codes is not None and len(candidates) > self.rerank:
+            tables = [codebook @ part for codebook, part in zip(self.codebooks, self._split(unit))]
+            approx = coarse[self.assignments[candidates]]
+            for m, table in enumerate(tables):
+                approx = approx + table[self.codes[candidates, m]]
+            candidates = candidates[np.argpartition(-approx, self.rerank - 1)[:self.rerank]]
+
+        if len(candidates) == 0:
+            return None, 0
+        # Même ordre que la recherche exhaustive en cas d'égalité
+        candidates = np.sort(candidates)
+        best_index, confidence = face_matcher.best_match(query, prepared.subset(candidates))
+        if best_index is None:
+            return None, 0
+        return int(candidates[best_index]), confidence
+
+    def _build_lists(self):
+        order = np.argsort(self.assignments, kind='stable')
+        bounds = np.cumsum(np.bincount(self.assignments, minlength=len(self.centroids)))[:-1]
+        self.lists = np.split(order, bounds)
+
+    def _split(self, vectors):
+        return np.array_split(vectors, self.pq_subvectors, axis=-1)
+
+    def _encode(self, residuals):
+        return np.stack([assign(part, codebook, spherical=False).astype(np.uint8)
+                         for part, codebook in zip(self._split(residuals), self.codebooks)], axis=1)
+
+    def to_arrays(self):
+        arrays = {'params': np.array([str(p) for p in self.params]),
+                  'centroids': self.centroids, 'assignments': self.assignments}
+        if self.codes is not None:
+            arrays['codes'] = self.codes
+            arrays.update({f"codebook_{m}": codebook for m, codebook in enumerate(self.codebooks)})
+        return arrays
+
+    def load_arrays(self, arrays):
+        """Restaure un index enregistré ; retourne False si ses paramètres ont changé"""
+        if list(arrays['params']) != [str(p) for p in self.params]:
+            return False
+        self.centroids = arrays['centroids']
+        self.assignments = arrays['assignments']
+        self._build_lists()
+        if self.pq_subvectors:
+            self.codes = arrays['codes']
+            self.codebooks = [arrays[f"codebook_{m}"] for m in range(self.pq_subvectors)]
+        return True
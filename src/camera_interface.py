@@ -1,9 +1,11 @@
 import cv2
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
 import os
 import time
+from src.frame_grabber import FrameGrabber
+from src.frame_scheduler import FrameScheduler
+from src.preview_renderer import PreviewRenderer
 
 class CameraInterface:
     def __init__(self):
@@ -17,6 +19,8 @@ class CameraInterface:
         
         self.camera_label = ttk.Label(self.camera_frame)
         self.camera_label.pack()
+        self.renderer = PreviewRenderer(self.camera_label)
+        self.scheduler = FrameScheduler(preview_only=True)
         
         # Cadre de saisie du nom
         name_frame = ttk.Frame(self.window)
@@ -65,21 +69,23 @@ class CameraInterface:
                     messagebox.showerror("Erreur", f"Erreur lors de la sauvegarde: {str(e)}")
     
     def start_camera(self):
-        self.cap = cv2.VideoCapture(0)
+        # Lecture de la caméra dans un thread dédié (voir settings.py pour la résolution et le format)
+        self.cap = FrameGrabber().start()
         self.update_camera()
 
     def update_camera(self):
         if self.cap is not None:
-            ret, frame = self.cap.read()
+            started = time.perf_counter()
+            _, preview = self.scheduler.due(started)
+            ret = False
+            if preview:
+                ret, frame = self.cap.read(timeout=0)
             if ret:
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                image = Image.fromarray(frame_rgb)
-                image = image.resize((640, 480))
-                self.photo = ImageTk.PhotoImage(image=image)
-                
-                self.camera_label.configure(image=self.photo)
-                
-                self.window.after(10, self.update_camera)
+                self.renderer.render(frame)
+            self.scheduler.record_iteration(started, False, ret)
+            
+            if ret or self.cap.running:
+                self.window.after(self.scheduler.next_delay(preview and not ret), self.update_camera)
     
     def close_camera(self):
         if self.cap is not None:
@@ -0,0 +1,87 @@
+import math
+import cv2
+from src.face_tracker import iou
+from settings import Settings
+
+# Plus petite fenêtre utile des cascades fournies (en pixels)
+MIN_DETECTOR_WINDOW = 24
+
+
+def face_size_range(frame_width):
+    """Tailles minimale et maximale (en pixels) d'un visage à la distance prévue de la borne"""
+    # Largeur de scène couverte par la caméra à une distance d : 2 d tan(champ / 2)
+    half_fov = math.tan(math.radians(Settings.CAMERA_HFOV) / 2)
+
+    def width_at(distance):
+        return frame_width * Settings.FACE_WIDTH / (2 * distance * half_fov)
+
+    # Marge pour les variations de taille de visage et d'orientation
+    return int(width_at(Settings.KIOSK_MAX_DISTANCE) * 0.75), int(math.ceil(width_at(Settings.KIOSK_MIN_DISTANCE) * 1.5))
+
+
+class FrameDetector:
+    """Détection adaptée au flux de la caméra.
+
+    L'image est réduite à une largeur cible (sans descendre sous la taille de
+    visage détectable), les tailles de visage recherchées sont bornées d'après la
+    distance à la borne, et les régions autour des visages déjà connus sont
+    explorées avant l'image entière. Les boîtes sont retournées à la résolution
+    d'origine.
+    """
+
+    def __init__(self, detect, target_width=None, roi_margin=None, full_frame_every=None):
+        # detect(gray, min_size, max_size) -> boîtes (x, y, w, h)
+        self.detect = detect
+        # 0 : pas de réduction
+        self.target_width = Settings.DETECT_WIDTH if target_width is None else target_width
+        # Marge ajoutée autour d'un visage connu, en fraction de sa taille
+        self.roi_margin = Settings.DETECT_ROI_MARGIN if roi_margin is None else roi_margin
+        # Une détection sur full_frame_every explore toute l'image même si les régions suffisent,
+        # pour repérer les visages qui viennent d'entrer dans le champ
+        self.full_frame_every = Settings.DETECT_FULL_FRAME_EVERY if full_frame_every is None else full_frame_every
+        self._calls = 0
+        self._sizes = {}
+
+    def __call__(self, gray, regions=()):
+        self._calls += 1
+        frame_h, frame_w = gray.shape[:2]
+        min_size, max_size = self._size_range(frame_w)
+
+        scale = 1.0
+        if self.target_width and frame_w > self.target_width:
+            # Ne pas réduire au point que le plus petit visage attendu devienne indétectable
+            scale = min(1.0, max(self.target_width / frame_w, MIN_DETECTOR_WINDOW / max(min_size, 1)))
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        min_size = max(MIN_DETECTOR_WINDOW, int(min_size * scale))
+        max_size = max(min_size, int(max_size * scale))
+
+        boxes = None
+        if regions and (self.full_frame_every <= 1 or self._calls % self.full_frame_every):
+            boxes = self._detect_regions(gray, regions, scale, min_size, max_size)
+        if boxes is None:
+            boxes = [tuple(box) for box in self.detect(gray, (min_size, min_size), (max_size, max_size))]
+        return [tuple(int(round(v / scale)) for v in box) for box in boxes]
+
+    def _size_range(self, frame_width):
+        if frame_width not in self._sizes:
+            self._sizes[frame_width] = face_size_range(frame_width)
+        return self._sizes[frame_width]
+
+    def _detect_regions(self, gray, regions, scale, min_size, max_size):
+        # Retourne None si l'un des visages connus n'est pas retrouvé dans sa région
+        height, width = gray.shape[:2]
+        boxes = []
+        for x, y, w, h in regions:
+            x, y, w, h = (int(v * scale) for v in (x, y, w, h))
+            margin_x, margin_y = int(w * self.roi_margin), int(h * self.roi_margin)
+            left, top = max(0, x - margin_x), max(0, y - margin_y)
+            right, bottom = min(width, x + w + margin_x), min(height, y + h + margin_y)
+            if right - left < min_size or bottom - top < min_size:
+                return None
+            found = self.detect(gray[top:bottom, left:right], (min_size, min_size), (max_size, max_size))
+            if len(found) == 0:
+                return None
+            boxes.extend((bx + left, by + top, bw, bh) for bx, by, bw, bh in found)
+        # Deux régions qui se recouvrent peuvent retrouver le même visage
+        return [box for i, box in enumerate(boxes) if all(iou(box, other) < 0.5 for other in boxes[:i])]
@@ -0,0 +1,109 @@
+import os
+import cv2
+import numpy as np
+from settings import Settings
+
+# Répertoire des cascades fournies avec l'application
+CASCADES_DIR = os.path.join(os.path.dirname(__file__), 'cascades')
+
+
+def find_cascade(filename):
+    """Chemin d'un fichier cascade : dossier de l'application, puis données d'OpenCV"""
+    directories = [CASCADES_DIR]
+    opencv_data = getattr(getattr(cv2, 'data', None), 'haarcascades', None)
+    if opencv_data:
+        directories.append(opencv_data)
+    for directory in directories:
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"Cascade file {filename} not found in: {', '.join(directories)}")
+
+
+class CascadeDetector:
+    """Détecteur à cascade de classifieurs OpenCV (Haar ou LBP)"""
+
+    name = None
+    filename = None
+
+    def __init__(self, scale_factor=1.3, min_neighbors=5):
+        path = find_cascade(self.filename)
+        self.cascade = cv2.CascadeClassifier(path)
+        if self.cascade.empty():
+            raise ValueError(f"Failed to load cascade classifier: {path}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+    def detect(self, image, min_size=None, max_size=None):
+        """Boîtes (x, y, w, h) des visages d'une image BGR ou en niveaux de gris"""
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return self.cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors,
+                                             minSize=min_size or (0, 0), maxSize=max_size or (0, 0))
+
+
+class HaarDetector(CascadeDetector):
+    """Cascade de Haar (détecteur historique de l'application)"""
+
+    name = 'haar'
+    filename = 'haarcascade_frontalface_default.xml'
+
+
+class LbpDetector(CascadeDetector):
+    """Cascade LBP : plus rapide que Haar, un peu moins précise.
+
+    Les roues opencv-python ne fournissent que les cascades de Haar : le fichier
+    lbpcascade_frontalface_improved.xml (dépôt opencv, data/lbpcascades) doit être
+    copié dans src/cascades.
+    """
+
+    name = 'lbp'
+    filename = 'lbpcascade_frontalface_improved.xml'
+
+    def __init__(self, scale_factor=1.1, min_neighbors=4):
+        super().__init__(scale_factor, min_neighbors)
+
+
+class DnnDetector:
+    """Détecteur SSD chargé avec cv2.dnn (par exemple res10_300x300_ssd, Caffe ou TensorFlow)"""
+
+    name = 'dnn'
+
+    def __init__(self, model_path=None, config_path=None, confidence=None, input_size=None):
+        model_path = model_path or Settings.DNN_MODEL
+        config_path = config_path if config_path is not None else Settings.DNN_CONFIG
+        for path in (model_path, config_path):
+            if path and not os.path.exists(path):
+                raise FileNotFoundError(f"DNN face detector file not found at: {path}")
+        self.net = cv2.dnn.readNet(model_path, config_path or '')
+        self.confidence = Settings.DNN_CONFIDENCE if confidence is None else confidence
+        self.input_size = input_size or Settings.DNN_INPUT_SIZE
+
+    def detect(self, image, min_size=None, max_size=None):
+        # Le réseau attend une image BGR : les images en niveaux de gris sont dupliquées sur 3 canaux
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        height, width = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(image, 1.0, (self.input_size, self.input_size), (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        # Sortie SSD : (1, 1, N, 7) = [image, classe, confiance, x1, y1, x2, y2] normalisés
+        detections = self.net.forward().reshape(-1, 7)
+        detections = detections[detections[:, 2] >= self.confidence]
+
+        corners = np.clip(detections[:, 3:7], 0, 1) * [width, height, width, height]
+        boxes = np.column_stack([corners[:, :2], corners[:, 2:] - corners[:, :2]]).astype(np.int32)
+        sizes = boxes[:, 2]
+        keep = (sizes > 0) & (sizes >= (min_size or (0,))[0])
+        if max_size:
+            keep &= sizes <= max_size[0]
+        return boxes[keep]
+
+
+DETECTORS = {detector.name: detector for detector in (HaarDetector, LbpDetector, DnnDetector)}
+
+
+def create_detector(name=None):
+    """Crée le détecteur configuré ('haar', 'lbp' ou 'dnn')"""
+    name = name or Settings.FACE_DETECTOR
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown face detector: {name}")
+    return DETECTORS[name]()
@@ -0,0 +1,81 @@
+import io
+import pickle
+import struct
+import numpy as np
+
+# Format binaire des encodages stockés dans FaceFeatures.face_encoding :
+#   en-tête  : magic (4 octets), version du format, code du dtype, nombre de
+#              dimensions, longueur de l'identifiant de l'extracteur
+#   puis     : dimensions (uint32), identifiant de l'extracteur (ASCII),
+#              remplissage jusqu'à un multiple de 8 octets
+#   données  : octets bruts du tableau (petit-boutiste), lisibles par np.frombuffer
+MAGIC = b'EFEC'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBBBB')
+ALIGNMENT = 8
+
+DTYPES = {
+    0: np.dtype('<u1'),
+    1: np.dtype('<f4'),
+    2: np.dtype('<f8'),
+}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+
+# Identifiant des anciens encodages (liste pickle des pixels 128x128)
+LEGACY_EXTRACTOR = 'raw128-v1'
+
+
+class _LegacyUnpickler(pickle.Unpickler):
+    # Les anciens encodages ne contiennent que des listes d'entiers :
+    # refuser tout chargement de classe rend la lecture sûre
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Forbidden global in legacy encoding: {module}.{name}")
+
+
+def is_legacy(blob):
+    """Indique si le blob est un ancien encodage pickle"""
+    return bytes(blob[:len(MAGIC)]) != MAGIC
+
+
+def encode_features(features, extractor):
+    """Sérialise un vecteur de caractéristiques dans le format binaire"""
+    array = np.asarray(features)
+    if array.dtype.kind in 'iu' and array.size and array.min() >= 0 and array.max() <= 255:
+        array = array.astype('<u1', copy=False)
+    elif array.dtype not in DTYPE_CODES:
+        array = array.astype('<f4')
+    array = np.ascontiguousarray(array.astype(array.dtype.newbyteorder('<'), copy=False))
+
+    tag = extractor.encode('ascii')
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, DTYPE_CODES[array.dtype], array.ndim, len(tag))
+    header += struct.pack(f'<{array.ndim}I', *array.shape) + tag
+    header += b'\0' * (-len(header) % ALIGNMENT)
+    return header + array.tobytes()
+
+
+def decode_features(blob):
+    """Lit un encodage (binaire ou ancien pickle).
+
+    Retourne (tableau, identifiant de l'extracteur). Pour le format binaire,
+    le tableau est une vue en lecture seule sur le blob, sans copie.
+    """
+    if is_legacy(blob):
+        features = _LegacyUnpickler(io.BytesIO(bytes(blob))).load()
+        return np.asarray(features, dtype=np.uint8), LEGACY_EXTRACTOR
+
+    magic, version, dtype_code, ndim, tag_length = HEADER.unpack_from(blob, 0)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported encoding format version: {version}")
+    if dtype_code not in DTYPES:
+        raise ValueError(f"Unsupported encoding dtype code: {dtype_code}")
+
+    offset = HEADER.size
+    shape = struct.unpack_from(f'<{ndim}I', blob, offset)
+    offset += 4 * ndim
+    extractor = bytes(blob[offset:offset + tag_length]).decode('ascii')
+    offset += tag_length
+    offset += -offset % ALIGNMENT
+
+    count = int(np.prod(shape)) if shape else 1
+    array = np.frombuffer(blob, dtype=DTYPES[dtype_code], count=count, offset=offset)
+    return array.reshape(shape), extractor
@@ -0,0 +1,465 @@
+import numpy as np
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:
+    # Windows : verrou exclusif seulement
+    fcntl = None
+    import msvcrt
+from src import face_matcher
+from src.face_matcher import PreparedGallery, prepare_gallery
+from src.face_encoding import decode_features
+from src.ann_index import IVFIndex
+from src.quantized_index import QuantizedIndex
+from src.face_templates import StudentTemplates
+from settings import Settings
+
+# Version du format de l'instantané disque, à incrémenter si son contenu change
+SNAPSHOT_FORMAT = 1
+# Fichier de l'index (IVF ou galerie quantifiée) dans le répertoire de l'instantané
+INDEX_FILE = 'index.npz'
+# Ordre des modèles agrégés par étudiant, enregistré avec l'instantané
+TEMPLATE_ROWS_FILE = 'template_rows'
+# Fichier de verrou partagé par les processus qui lisent ou écrivent l'instantané
+LOCK_FILE = 'snapshot.lock'
+
+
+@contextmanager
+def _file_lock(path, exclusive=True):
+    """Verrou consultatif sur path : partagé pour la lecture, exclusif pour l'écriture"""
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class FaceGallery:
+    """Cache en mémoire des encodages de visages de la table FaceFeatures"""
+
+    GALLERY_QUERY = """
+        SELECT f.etudiant_id, e.nom_famille, e.prenom, c.id, c.nom_classe, f.face_encoding
+        FROM Etudiants e
+        JOIN FaceFeatures f ON e.id = f.etudiant_id
+        JOIN Classe c ON e.id_classe = c.id
+        {filter}
+        ORDER BY f.id
+    """
+
+    # Tableaux enregistrés dans l'instantané (un fichier .npy chacun), en plus
+    # de ceux calculés par la galerie préparée
+    SNAPSHOT_ARRAYS = ('matrix', 'ids', 'noms', 'prenoms', 'class_ids', 'class_names')
+
+    def __init__(self, db_connection, image_processor=None, refresh_interval=5.0, snapshot_dir=None,
+                 template_mode=None):
+        self.db = db_connection
+        # Convertit les encodages stockés vers l'espace de caractéristiques courant
+        self.image_processor = image_processor
+        # Intervalle (en secondes) entre deux vérifications de la version de FaceFeatures
+        self.refresh_interval = refresh_interval
+        # Répertoire de l'instantané disque, à côté de local.db par défaut
+        if snapshot_dir is None and hasattr(db_connection, 'get_data_directory'):
+            db_name = os.path.splitext(db_connection.config['database'])[0]
+            snapshot_dir = os.path.join(db_connection.get_data_directory(), f"{db_name}_gallery")
+        self.snapshot_dir = snapshot_dir
+        self._version = None
+        self._stale = True
+        self._last_check = 0
+        # Comparaison à chaque image ('image') ou à des modèles agrégés par étudiant ('mean', 'medoids')
+        self.template_mode = template_mode or Settings.GALLERY_TEMPLATES
+        self.templates = None
+        # Index approximatif (IVF pour les grandes galeries, ou galerie quantifiée en int8)
+        self.index = None
+        self._set_arrays(np.empty((0, 0)), [], [], [], [], [])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _set_arrays(self, matrix, ids, noms, prenoms, class_ids, class_names, prepared=None):
+        # Matrice contiguë (une ligne par encodage, dans le type des encodages) et tableaux parallèles
+        self.matrix = np.ascontiguousarray(matrix)
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.noms = np.asarray(noms, dtype=str)
+        self.prenoms = np.asarray(prenoms, dtype=str)
+        self.class_ids = np.asarray(class_ids, dtype=np.int64)
+        self.class_names = np.asarray(class_names, dtype=str)
+        # Galerie préparée une seule fois pour le calcul des correspondances
+        self.prepared = prepared if prepared is not None else prepare_gallery(self.matrix, self.metric)
+        self._partition_cache = None
+
+    @property
+    def search_prepared(self):
+        # Vecteurs effectivement comparés à la requête
+        return self.templates.prepared if self.templates is not None else self.prepared
+
+    @property
+    def metric(self):
+        return self.image_processor.metric if self.image_processor is not None else 'cosine'
+
+    def invalidate(self):
+        """Force le rechargement de la galerie au prochain accès"""
+        self._stale = True
+
+    def _query(self, query, params=None):
+        # Exceptions propagées, sans boîte de dialogue comme execute_query : la galerie est
+        # rechargée par le thread ou le processus de reconnaissance, hors du thread Tk
+        with self.db.transaction() as transaction:
+            return transaction.execute(query, params)
+
+    def get_db_version(self):
+        """Retourne un marqueur de version de la table FaceFeatures"""
+        result = self._query(
+            "SELECT COUNT(*), MAX(id), MAX(date_creation) FROM FaceFeatures"
+        )
+        if not result:
+            return None
+        # Normaliser les types (datetime MySQL, etc.) pour pouvoir comparer avec l'instantané
+        version = [SNAPSHOT_FORMAT] + [None if v is None else str(v) for v in result[0]]
+        if self.image_processor is not None:
+            version += [self.image_processor.extractor_id, self.metric]
+        return version + [self.template_mode]
+
+    def ensure_loaded(self):
+        """Recharge la galerie si elle a été invalidée ou si FaceFeatures a changé.
+
+        Les erreurs de la base sont propagées à l'appelant (résultat d'analyse en erreur
+        pour la reconnaissance en direct).
+        """
+        now = time.time()
+        if not self._stale and now - self._last_check >= self.refresh_interval:
+            self._last_check = now
+            if self.get_db_version() != self._version:
+                self._stale = True
+
+        if self._stale:
+            self.reload()
+        return self
+
+    def reload(self):
+        version = self.get_db_version()
+        if version is not None and self.load_snapshot(version):
+            pass
+        else:
+            if version is not None and self._is_append_only(version) and self.load_new_rows(version):
+                self.save_snapshot(version)
+            else:
+                self.load_from_database()
+                self.build_templates()
+                self.build_index()
+                if version is not None:
+                    self.save_snapshot(version)
+            # Galerie quantifiée : seuls les codes int8 restent en mémoire ; les matrices
+            # float64 sont remplacées par l'instantané projeté en mémoire (mmap), dont
+            # seules les lignes re-classées sont lues
+            if Settings.GALLERY_QUANTIZED and version is not None:
+                self.load_snapshot(version)
+
+        self._version = version
+        self._stale = False
+        self._last_check = time.time()
+
+    def best_match(self, face_features, class_name=None, fallback_threshold=None):
+        """Retourne (index, confiance) du meilleur encodage de la galerie.
+
+        Si class_name est indiqué, seule la partition de cette classe est parcourue ;
+        la galerie complète n'est utilisée que si aucune correspondance n'atteint
+        fallback_threshold dans la classe.
+        """
+        return self.best_matches(np.asarray(face_features)[None], class_name, fallback_threshold)[0]
+
+    def best_matches(self, faces_features, class_name=None, fallback_threshold=None):
+        """Variante de best_match pour plusieurs visages (une ligne chacun) d'une même image"""
+        faces_features = np.asarray(faces_features)
+        if class_name is not None:
+            rows, prepared = self._class_partition(class_name)
+            results = [(None, 0)] * len(faces_features)
+            if len(rows) and prepared is None:
+                # Galerie quantifiée : codes de la classe, candidats re-classés dans l'instantané
+                results = [self.index.search(features, self.search_prepared, rows=rows) for features in faces_features]
+                results = [(self._image_row(index) if index is not None else None, confidence)
+                           for index, confidence in results]
+            elif len(rows):
+                results = [(self._image_row(rows[index]) if index is not None else None, confidence)
+                           for index, confidence in face_matcher.best_matches(faces_features, prepared)]
+            if fallback_threshold is None:
+                return results
+            # Seuls les visages non reconnus dans la classe sont recherchés dans toute la galerie
+            retry = [i for i, (_, confidence) in enumerate(results) if confidence < fallback_threshold]
+            if retry:
+                for i, fallback in zip(retry, self.best_matches(faces_features[retry])):
+                    if fallback[1] > results[i][1]:
+                        results[i] = fallback
+            return results
+
+        if self.index is not None:
+            results = [self.index.search(features, self.search_prepared) for features in faces_features]
+        else:
+            results = face_matcher.best_matches(faces_features, self.search_prepared)
+        return [(self._image_row(index) if index is not None else None, confidence)
+                for index, confidence in results]
+
+    def _image_row(self, index):
+        # Un modèle agrégé renvoie vers une image représentative de l'étudiant
+        if self.templates is not None:
+            return int(self.templates.template_rows[index])
+        return int(index)
+
+    def _class_partition(self, class_name):
+        # Lignes (de la galerie comparée) appartenant à la classe, et galerie préparée
+        # restreinte à ces lignes ; conservées tant que la galerie ne change pas.
+        # Galerie quantifiée : seules les lignes sont conservées (galerie préparée None)
+        if self._partition_cache is None or self._partition_cache[0] != class_name:
+            class_names = self.class_names
+            if self.templates is not None:
+                class_names = class_names[self.templates.template_rows]
+            rows = np.flatnonzero(class_names == class_name)
+            prepared = None if isinstance(self.index, QuantizedIndex) else self.search_prepared.subset(rows)
+            self._partition_cache = (class_name, rows, prepared)
+        return self._partition_cache[1:]
+
+    def build_templates(self, template_rows=None):
+        """Calcule les modèles agrégés par étudiant selon le mode configuré.
+
+        template_rows : ordre des modèles enregistré dans l'instantané, repris s'il
+        correspond encore à la galerie (les lignes de l'index en dépendent).
+        """
+        self.templates = None
+        self._partition_cache = None
+        if self.template_mode != 'image':
+            self.templates = StudentTemplates(self.template_mode, Settings.GALLERY_MEDOIDS)
+            if template_rows is None or not self.templates.restore(self.prepared, self.ids, template_rows):
+                self.templates.build(self.prepared, self.ids)
+
+    def _index_order(self):
+        # Empreinte de l'ordre des vecteurs indexés : un index enregistré pour un autre
+        # ordre (modèles reconstruits différemment) ne doit pas être réutilisé
+        rows = self.templates.template_rows if self.templates is not None else np.arange(len(self.prepared))
+        digest = hashlib.sha1(np.ascontiguousarray(rows, dtype='<i8').tobytes()).hexdigest()
+        return f"{self.template_mode}-{len(rows)}-{digest}"
+
+    def build_index(self):
+        """Construit l'index si la galerie dépasse la taille configurée"""
+        self.index = None
+        if len(self.search_prepared) >= self._index_min_size():
+            self.index = self._new_index().build(self.search_prepared)
+
+    def _index_min_size(self):
+        # La galerie quantifiée remplace la recherche exhaustive quelle que soit sa taille
+        return 1 if Settings.GALLERY_QUANTIZED else Settings.ANN_MIN_GALLERY
+
+    def _new_index(self):
+        if Settings.GALLERY_QUANTIZED:
+            return QuantizedIndex(self.metric, Settings.QUANTIZED_RERANK)
+        return IVFIndex(self.metric, Settings.ANN_LISTS, Settings.ANN_NPROBE,
+                        Settings.ANN_PQ_SUBVECTORS, Settings.ANN_RERANK)
+
+    def _is_append_only(self, version):
+        # Mêmes paramètres, plus de lignes et un identifiant maximal connu :
+        # seules les nouvelles lignes ont besoin d'être chargées
+        old = self._version
+        return (old is not None and old[0] == version[0] and old[4:] == version[4:]
+                and old[2] is not None and int(version[1]) > int(old[1]))
+
+    def load_new_rows(self, version):
+        """Ajoute à la galerie les lignes de FaceFeatures créées depuis la dernière version"""
+        results = self._query(
+            self.GALLERY_QUERY.format(filter="WHERE f.id > %s"), (int(self._version[2]),)
+        ) or []
+        # Des lignes ont été supprimées ou ne sont pas jointes : rechargement complet
+        if len(results) != int(version[1]) - int(self._version[1]):
+            return False
+
+        decoded = self._decode_rows(results, self.matrix.shape[1] if len(self) else None)
+        if not decoded[0]:
+            return True
+        new_matrix = np.vstack(decoded[0])
+        new_prepared = face_matcher.prepare_gallery(new_matrix, self.metric)
+        matrix = np.vstack([self.matrix, new_matrix]) if len(self) else new_matrix
+        arrays = [np.concatenate([getattr(self, name), values])
+                  for name, values in zip(self.SNAPSHOT_ARRAYS[1:], decoded[1:])]
+        start = len(self)
+        prepared = self.prepared.extend(new_matrix) if len(self) else new_prepared
+        self._set_arrays(matrix, *arrays, prepared)
+
+        if self.templates is None:
+            if self.index is not None:
+                self.index.add(new_prepared)
+            else:
+                self.build_index()
+            return True
+
+        # Seuls les modèles des étudiants concernés sont recalculés
+        replaced, added = self.templates.update(self.prepared, np.arange(start, len(self)), self.ids)
+        self._partition_cache = None
+        if self.index is None:
+            self.build_index()
+            return True
+        templates = self.templates.prepared
+        if len(replaced):
+            self.index.update(replaced, templates.subset(replaced))
+        if added:
+            self.index.add(templates.subset(np.arange(len(templates) - added, len(templates))))
+        return True
+
+    def load_from_database(self):
+        # Lignes décodées au fil de la lecture : les encodages bruts ne sont pas tous chargés à la fois
+        encodings, *columns = self._decode_rows(self.db.fetch_iter(self.GALLERY_QUERY.format(filter="")))
+        matrix = np.vstack(encodings) if encodings else np.empty((0, 0))
+        self._set_arrays(matrix, *columns)
+
+    def _decode_rows(self, results, dimension=None):
+        encodings, ids, noms, prenoms, class_ids, class_names = [], [], [], [], [], []
+        for etudiant_id, nom, prenom, class_id, class_name, blob in results:
+            try:
+                features, extractor = decode_features(blob)
+                if self.image_processor is not None:
+                    features = self.image_processor.to_feature_space(features, extractor)
+                    if features is None:
+                        raise ValueError(f"Encoding from another extractor ({extractor})")
+                encoding = np.asarray(features).flatten()
+                # Ignorer les encodages dont la taille ne correspond pas aux autres
+                if dimension is None:
+                    dimension = encoding.size
+                if encoding.size != dimension:
+                    raise ValueError(f"Unexpected encoding size {encoding.size}")
+            except Exception as e:
+                print(f"Error processing encoding: {e}")
+                continue
+
+            encodings.append(encoding)
+            ids.append(etudiant_id)
+            noms.append(nom)
+            prenoms.append(prenom)
+            class_ids.append(class_id)
+            class_names.append(class_name)
+
+        return encodings, ids, noms, prenoms, class_ids, class_names
+
+    def _prepared_arrays(self):
+        # Tableaux précalculés par la galerie préparée (vide pour les histogrammes)
+        return PreparedGallery.SNAPSHOT_ARRAYS if self.metric == PreparedGallery.metric else ()
+
+    def _snapshot_file(self, name):
+        return os.path.join(self.snapshot_dir, f"{name}.npy")
+
+    def _snapshot_lock(self, exclusive):
+        return _file_lock(os.path.join(self.snapshot_dir, LOCK_FILE), exclusive)
+
+    def _write_atomic(self, path, write, suffix):
+        # Fichier temporaire propre à ce processus, renommé une fois complet
+        fd, tmp_path = tempfile.mkstemp(dir=self.snapshot_dir, suffix=suffix)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def load_snapshot(self, version):
+        """Ouvre l'instantané disque s'il correspond à la version de la base"""
+        if not self.snapshot_dir or not os.path.isdir(self.snapshot_dir):
+            return False
+        try:
+            # Verrou partagé : aucun processus ne remplace les fichiers pendant leur ouverture
+            with self._snapshot_lock(exclusive=False):
+                with open(os.path.join(self.snapshot_dir, 'stamp.json'), encoding='utf-8') as f:
+                    if json.load(f) != version:
+                        return False
+
+                # mmap_mode='r' : rien n'est lu avant le premier accès et les pages
+                # sont partagées entre les processus qui ouvrent le même instantané
+                arrays = {name: np.load(self._snapshot_file(name), mmap_mode='r')
+                          for name in self.SNAPSHOT_ARRAYS}
+                prepared_arrays = {name: np.load(self._snapshot_file(name), mmap_mode='r')
+                                   for name in self._prepared_arrays()}
+                template_rows = None
+                if self.template_mode != 'image' and os.path.exists(self._snapshot_file(TEMPLATE_ROWS_FILE)):
+                    template_rows = np.load(self._snapshot_file(TEMPLATE_ROWS_FILE))
+            if len({len(array) for array in (*arrays.values(), *prepared_arrays.values())}) != 1:
+                return False
+        except (OSError, ValueError):
+            return False
+
+        prepared = prepare_gallery(arrays['matrix'], self.metric, prepared_arrays)
+        self._set_arrays(arrays['matrix'], arrays['ids'], arrays['noms'], arrays['prenoms'],
+                         arrays['class_ids'], arrays['class_names'], prepared)
+        self.build_templates(template_rows)
+        self.load_index()
+        return True
+
+    def load_index(self):
+        """Restaure l'index de l'instantané, ou le reconstruit s'il est absent ou obsolète"""
+        self.index = None
+        if len(self.search_prepared) < self._index_min_size():
+            return
+        index = self._new_index()
+        try:
+            with self._snapshot_lock(exclusive=False), \
+                    np.load(os.path.join(self.snapshot_dir, INDEX_FILE), allow_pickle=False) as data:
+                if (str(data['order']) == self._index_order() and index.load_arrays(data)
+                        and len(index) == len(self.search_prepared)):
+                    self.index = index
+                    return
+        except (OSError, KeyError, ValueError):
+            pass
+        self.build_index()
+        try:
+            with self._snapshot_lock(exclusive=True):
+                self._save_index()
+        except OSError as e:
+            print(f"Error saving gallery index: {e}")
+
+    def _save_index(self):
+        # Appelé sous le verrou exclusif de l'instantané
+        index_path = os.path.join(self.snapshot_dir, INDEX_FILE)
+        if self.index is None:
+            if os.path.exists(index_path):
+                os.remove(index_path)
+            return
+        arrays = dict(self.index.to_arrays(), order=np.array(self._index_order()))
+        self._write_atomic(index_path, lambda f: np.savez(f, **arrays), '.npz')
+
+    def save_snapshot(self, version):
+        """Écrit la galerie décodée sur disque, le marqueur de version en dernier"""
+        if not self.snapshot_dir:
+            return
+        arrays = {name: getattr(self, name) for name in self.SNAPSHOT_ARRAYS}
+        arrays.update({name: getattr(self.prepared, name) for name in self._prepared_arrays()})
+        if self.templates is not None:
+            arrays[TEMPLATE_ROWS_FILE] = self.templates.template_rows
+        stamp_path = os.path.join(self.snapshot_dir, 'stamp.json')
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            # Verrou exclusif : un seul processus écrit, aucun ne lit pendant ce temps
+            with self._snapshot_lock(exclusive=True):
+                # Invalider l'ancien instantané avant de remplacer ses fichiers
+                if os.path.exists(stamp_path):
+                    os.remove(stamp_path)
+                for name, array in arrays.items():
+                    self._write_atomic(self._snapshot_file(name),
+                                       lambda f: np.save(f, np.asarray(array), allow_pickle=False), '.npy')
+                if self.templates is None and os.path.exists(self._snapshot_file(TEMPLATE_ROWS_FILE)):
+                    os.remove(self._snapshot_file(TEMPLATE_ROWS_FILE))
+                self._save_index()
+                stamp = json.dumps(version).encode('utf-8')
+                self._write_atomic(stamp_path, lambda f: f.write(stamp), '.json')
+        except OSError as e:
+            # Un autre processus peut garder les fichiers ouverts (Windows) : nouvel essai au prochain rechargement
+            print(f"Error saving gallery snapshot: {e}")
@@ -0,0 +1,274 @@
+import numpy as np
+
+# Mêmes constantes que FaceRecognition.compare_faces
+MIN_STD = 1e-6
+MAX_MEAN_ABS_DIFF = 0.5
+PENALTY_THRESHOLD = 75
+PENALTY_FACTOR = 0.8
+
+# Pour deux vecteurs centrés-réduits, la moyenne des écarts absolus est bornée
+# par sqrt(2 * (1 - cos)) : au-dessus de ce cosinus le filtre passe forcément
+COSINE_GATE_BOUND = 1 - MAX_MEAN_ABS_DIFF ** 2 / 2 + 1e-9
+
+# Nombre de lignes traitées à la fois pour le filtre sur les écarts absolus
+CHUNK_SIZE = 256
+
+
+class PreparedGallery:
+    """Galerie centrée-réduite une seule fois, prête pour le calcul en lot"""
+
+    metric = 'cosine'
+    # Tableaux calculés à conserver dans l'instantané disque de la galerie
+    SNAPSHOT_ARRAYS = ('standardized', 'norms', 'valid')
+
+    def __init__(self, matrix):
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.ndim != 2:
+            matrix = matrix.reshape(len(matrix), -1)
+
+        if matrix.size == 0:
+            matrix = np.zeros((len(matrix), 1))
+
+        std = matrix.std(axis=1, keepdims=True)
+        self.valid = std[:, 0] >= MIN_STD
+        safe_std = np.where(std >= MIN_STD, std, 1.0)
+        self.standardized = np.ascontiguousarray((matrix - matrix.mean(axis=1, keepdims=True)) / safe_std)
+        # Les lignes constantes gardent une norme de 1 pour éviter une division par zéro
+        self.norms = np.where(self.valid, np.linalg.norm(self.standardized, axis=1), 1.0)
+
+    @classmethod
+    def from_arrays(cls, matrix, standardized, norms, valid):
+        """Reconstruit une galerie préparée à partir de tableaux déjà calculés"""
+        prepared = cls.__new__(cls)
+        prepared.standardized = standardized
+        prepared.norms = norms
+        prepared.valid = valid
+        return prepared
+
+    def __len__(self):
+        return len(self.standardized)
+
+    def subset(self, rows):
+        """Galerie préparée restreinte aux lignes indiquées"""
+        return PreparedGallery.from_arrays(None, self.standardized[rows], self.norms[rows], self.valid[rows])
+
+    def feature_vectors(self, rows):
+        """Vecteurs centrés-réduits des lignes indiquées (base des modèles agrégés)"""
+        return self.standardized[rows]
+
+    def replace_rows(self, rows, matrix):
+        """Remplace sur place les lignes indiquées (galerie en mémoire uniquement)"""
+        replacement = PreparedGallery(matrix)
+        self.standardized[rows] = replacement.standardized
+        self.norms[rows] = replacement.norms
+        self.valid[rows] = replacement.valid
+
+    def extend(self, matrix):
+        """Nouvelle galerie préparée complétée par les lignes de matrix"""
+        added = PreparedGallery(matrix)
+        return PreparedGallery.from_arrays(
+            None,
+            np.concatenate([self.standardized, added.standardized]),
+            np.concatenate([self.norms, added.norms]),
+            np.concatenate([self.valid, added.valid])
+        )
+
+    def unit_vectors(self):
+        """Vecteurs de norme 1 dont le produit scalaire est le cosinus utilisé pour le score"""
+        return self.standardized / self.norms[:, None]
+
+
+class HistogramGallery:
+    """Galerie d'histogrammes normalisés comparés par chi-deux ou par intersection"""
+
+    SNAPSHOT_ARRAYS = ()
+
+    def __init__(self, matrix, metric='chi2'):
+        if metric not in ('chi2', 'intersection'):
+            raise ValueError(f"Unknown histogram metric: {metric}")
+        self.metric = metric
+        # Type d'origine conservé (float32 pour LBP) : un instantané projeté en mémoire n'est pas copié
+        matrix = np.asarray(matrix)
+        self.histograms = matrix if matrix.dtype.kind == 'f' else matrix.astype(np.float64)
+
+    def __len__(self):
+        return len(self.histograms)
+
+    def subset(self, rows):
+        return HistogramGallery(self.histograms[rows], self.metric)
+
+    def feature_vectors(self, rows):
+        return self.histograms[rows]
+
+    def replace_rows(self, rows, matrix):
+        self.histograms[rows] = matrix
+
+    def extend(self, matrix):
+        return HistogramGallery(np.concatenate([self.histograms, np.asarray(matrix)]), self.metric)
+
+    def unit_vectors(self):
+        # Plongement de Hellinger : racine des histogrammes, de norme 1
+        roots = np.sqrt(self.histograms)
+        return roots / np.maximum(np.linalg.norm(roots, axis=1, keepdims=True), 1e-12)
+
+
+def prepare_gallery(matrix, metric='cosine', arrays=None):
+    """Prépare une galerie pour la mesure de similarité de l'extracteur courant"""
+    if metric == 'cosine':
+        if arrays:
+            return PreparedGallery.from_arrays(matrix, **arrays)
+        return PreparedGallery(matrix)
+    return HistogramGallery(matrix, metric)
+
+
+def histogram_confidences(query, prepared):
+    """Confiances (0-100) d'un histogramme requête contre toute la galerie"""
+    query = np.asarray(query, dtype=np.float64).ravel()
+    histograms = prepared.histograms
+    if prepared.metric == 'intersection':
+        return 100 * np.minimum(histograms, query).sum(axis=1)
+
+    # Distance du chi-deux entre histogrammes de somme 1, comprise entre 0 et 2
+    numerator = (histograms - query) ** 2
+    denominator = histograms + query
+    ratio = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+    return 100 * (1 - ratio.sum(axis=1) / 2)
+
+
+def unit_query(query, metric='cosine'):
+    """Requête dans le même espace que PreparedGallery.unit_vectors / HistogramGallery.unit_vectors"""
+    if metric == 'cosine':
+        query_norm = standardize_query(query)
+        if query_norm is None:
+            return None
+        return query_norm / np.linalg.norm(query_norm)
+    root = np.sqrt(np.asarray(query, dtype=np.float64).ravel())
+    return root / max(np.linalg.norm(root), 1e-12)
+
+
+def standardize_query(query):
+    """Centre-réduit le vecteur requête, ou retourne None s'il est constant"""
+    query = np.asarray(query, dtype=np.float64).flatten()
+    std = np.std(query)
+    if std < MIN_STD:
+        return None
+    return (query - np.mean(query)) / std
+
+
+def raw_confidences(query_norm, prepared):
+    """Confiances avant le filtre sur les écarts absolus (un seul produit matriciel).
+
+    query_norm peut aussi être une matrice (une requête par ligne) : les tableaux
+    retournés ont alors une colonne par requête.
+    """
+    if query_norm.ndim == 1:
+        cosine = (prepared.standardized @ query_norm) / (prepared.norms * np.linalg.norm(query_norm))
+    else:
+        cosine = (prepared.standardized @ query_norm.T) / np.outer(prepared.norms, np.linalg.norm(query_norm, axis=1))
+    confidences = (cosine + 1) * 50
+    confidences = np.where(confidences < PENALTY_THRESHOLD, confidences * PENALTY_FACTOR, confidences)
+    confidences = np.clip(confidences, 0, 100)
+    confidences[~prepared.valid] = 0
+    return cosine, confidences
+
+
+def passes_gate(query_norm, prepared, indices):
+    """Applique le filtre sur la moyenne des écarts absolus aux lignes indiquées"""
+    passed = np.empty(len(indices), dtype=bool)
+    for start in range(0, len(indices), CHUNK_SIZE):
+        rows = indices[start:start + CHUNK_SIZE]
+        diff = np.abs(prepared.standardized[rows] - query_norm)
+        passed[start:start + CHUNK_SIZE] = diff.mean(axis=1) <= MAX_MEAN_ABS_DIFF
+    return passed
+
+
+def match(query, gallery_matrix, prepared=None):
+    """Compare la requête à toute la galerie.
+
+    Retourne (best_index, confidences) avec les mêmes scores que compare_faces,
+    best_index valant None si aucune confiance n'est strictement positive.
+    """
+    if prepared is None:
+        prepared = PreparedGallery(gallery_matrix)
+
+    if prepared.metric != 'cosine':
+        confidences = histogram_confidences(query, prepared) if len(prepared) else np.zeros(0)
+        best_index = int(np.argmax(confidences)) if len(confidences) else None
+        if best_index is None or confidences[best_index] <= 0:
+            return None, confidences
+        return best_index, confidences
+
+    confidences = np.zeros(len(prepared))
+    query_norm = standardize_query(query)
+    if query_norm is None or len(prepared) == 0:
+        return None, confidences
+
+    cosine, raw = raw_confidences(query_norm, prepared)
+
+    # Le filtre n'est calculé que pour les lignes où il n'est pas garanti
+    candidates = np.flatnonzero((raw > 0) & (cosine < COSINE_GATE_BOUND))
+    gated = candidates[~passes_gate(query_norm, prepared, candidates)]
+    confidences[:] = raw
+    confidences[gated] = 0
+
+    best_index = int(np.argmax(confidences))
+    if confidences[best_index] <= 0:
+        return None, confidences
+    return best_index, confidences
+
+
+def best_match(query, prepared):
+    """Variante de match qui ne calcule le filtre que jusqu'au premier candidat retenu.
+
+    Retourne (best_index, confidence) ; best_index vaut None si aucun candidat.
+    """
+    if prepared.metric != 'cosine':
+        best_index, confidences = match(query, None, prepared)
+        return best_index, float(confidences[best_index]) if best_index is not None else 0
+
+    query_norm = standardize_query(query)
+    if query_norm is None or len(prepared) == 0:
+        return None, 0
+
+    cosine, raw = raw_confidences(query_norm, prepared)
+    return _first_passing(query_norm, prepared, cosine, raw)
+
+
+def best_matches(queries, prepared):
+    """Variante de best_match pour plusieurs requêtes (une par ligne).
+
+    Les scores de toutes les requêtes sont obtenus par un seul produit matriciel ;
+    retourne une liste de (best_index, confidence).
+    """
+    queries = np.asarray(queries, dtype=np.float64)
+    queries = queries.reshape(len(queries), -1)
+    if prepared.metric != 'cosine':
+        return [best_match(query, prepared) for query in queries]
+
+    results = [(None, 0)] * len(queries)
+    std = queries.std(axis=1, keepdims=True)
+    usable = np.flatnonzero(std[:, 0] >= MIN_STD)
+    if len(prepared) == 0 or len(usable) == 0:
+        return results
+
+    queries_norm = (queries[usable] - queries[usable].mean(axis=1, keepdims=True)) / std[usable]
+    cosine, raw = raw_confidences(queries_norm, prepared)
+    for column, row in enumerate(usable):
+        results[row] = _first_passing(queries_norm[column], prepared, cosine[:, column], raw[:, column])
+    return results
+
+
+def _first_passing(query_norm, prepared, cosine, raw):
+    # Parcourir les candidats par confiance décroissante (ordre stable en cas d'égalité)
+    order = np.argsort(-raw, kind='stable')
+    order = order[raw[order] > 0]
+    for start in range(0, len(order), CHUNK_SIZE):
+        rows = order[start:start + CHUNK_SIZE]
+        passed = cosine[rows] >= COSINE_GATE_BOUND
+        unsure = np.flatnonzero(~passed)
+        if len(unsure):
+            passed[unsure] = passes_gate(query_norm, prepared, rows[unsure])
+        if passed.any():
+            best_index = int(rows[np.argmax(passed)])
+            return best_index, float(raw[best_index])
+    return None, 0
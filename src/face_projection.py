@@ -0,0 +1,136 @@
+"""Projection PCA (Eigenfaces), éventuellement suivie d'une LDA (Fisherfaces).
+
+Entraînement sur les images enregistrées dans faces_imgs :
+    python -m src.face_projection [--components 128] [--lda] [--faces-dir faces_imgs]
+"""
+import argparse
+import hashlib
+import os
+import numpy as np
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'models', 'face_projection.npz')
+
+
+class FaceProjection:
+    def __init__(self, mean, components, kind='pca'):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        # Matrice de projection (dimension d'entrée x dimension réduite)
+        self.components = np.ascontiguousarray(components, dtype=np.float32)
+        self.kind = kind
+        digest = hashlib.sha1(self.mean.tobytes() + self.components.tobytes()).hexdigest()[:12]
+        # Identifiant de version enregistré avec chaque encodage projeté
+        self.model_id = f"{kind}{self.components.shape[1]}-{digest}"
+
+    @property
+    def input_dim(self):
+        return self.components.shape[0]
+
+    @property
+    def output_dim(self):
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, samples, labels=None, n_components=128, use_lda=False):
+        """Calcule la projection à partir d'une matrice (n échantillons x dimension d'entrée)"""
+        X = np.asarray(samples, dtype=np.float64)
+        mean = X.mean(axis=0)
+        Xc = X - mean
+        # SVD réduite : les composantes principales sont les lignes de vt
+        _, _, vt = np.linalg.svd(Xc, full_matrices=False)
+
+        if not use_lda:
+            return cls(mean, vt[:min(n_components, len(vt))].T, 'pca')
+
+        if labels is None:
+            raise ValueError("LDA requires one label per sample")
+        labels = np.asarray(labels)
+        classes = np.unique(labels)
+        if len(classes) < 2:
+            raise ValueError("LDA requires at least two classes")
+
+        # Fisherfaces : PCA sur n - c dimensions pour que la dispersion intra-classe soit inversible
+        pca_dims = min(len(X) - len(classes), len(vt))
+        if pca_dims < 1:
+            raise ValueError("Not enough samples per class for LDA")
+        pca = vt[:pca_dims].T
+        Y = Xc @ pca
+
+        overall_mean = Y.mean(axis=0)
+        within = np.zeros((pca_dims, pca_dims))
+        between = np.zeros((pca_dims, pca_dims))
+        for label in classes:
+            Yc = Y[labels == label]
+            class_mean = Yc.mean(axis=0)
+            centered = Yc - class_mean
+            within += centered.T @ centered
+            diff = (class_mean - overall_mean)[:, None]
+            between += len(Yc) * (diff @ diff.T)
+
+        # Blanchiment de la dispersion intra-classe puis diagonalisation de la dispersion inter-classe
+        within += np.eye(pca_dims) * (1e-6 * np.trace(within) / pca_dims + 1e-12)
+        w_values, w_vectors = np.linalg.eigh(within)
+        whitening = w_vectors / np.sqrt(w_values)
+        b_values, b_vectors = np.linalg.eigh(whitening.T @ between @ whitening)
+        order = np.argsort(b_values)[::-1][:min(n_components, len(classes) - 1)]
+        return cls(mean, pca @ (whitening @ b_vectors[:, order]), 'lda')
+
+    def project(self, features):
+        """Projette un vecteur (ou une matrice de vecteurs) dans l'espace réduit"""
+        features = np.asarray(features, dtype=np.float32)
+        return (features - self.mean) @ self.components
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path, mean=self.mean, components=self.components, kind=np.array(self.kind))
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['mean'], data['components'], str(data['kind']))
+
+
+def load_training_set(image_processor, faces_dir='faces_imgs'):
+    """Extrait les visages bruts de faces_imgs/<classe>/<étudiant>/*.jpg avec l'étudiant comme étiquette"""
+    samples, labels = [], []
+    for class_name in sorted(os.listdir(faces_dir)):
+        class_dir = os.path.join(faces_dir, class_name)
+        if not os.path.isdir(class_dir):
+            continue
+        for student in sorted(os.listdir(class_dir)):
+            student_dir = os.path.join(class_dir, student)
+            if not os.path.isdir(student_dir):
+                continue
+            for filename in sorted(os.listdir(student_dir)):
+                image_path = os.path.join(student_dir, filename)
+                try:
+                    face_coords = image_processor.detect_face(image_path)
+                    samples.append(image_processor.extract_raw_features(image_path, face_coords))
+                    labels.append(f"{class_name}/{student}")
+                except ValueError as e:
+                    print(f"Image ignorée ({image_path}): {e}")
+    return np.array(samples), np.array(labels)
+
+
+def main():
+    from src.image_processor import ImageProcessor
+
+    parser = argparse.ArgumentParser(description="Entraînement de la projection Eigenfaces/Fisherfaces")
+    parser.add_argument('--faces-dir', default='faces_imgs', help="Répertoire des images enregistrées")
+    parser.add_argument('--components', type=int, default=128, help="Dimension de l'espace réduit")
+    parser.add_argument('--lda', action='store_true', help="Ajouter une étape LDA (Fisherfaces)")
+    parser.add_argument('--output', default=DEFAULT_MODEL_PATH, help="Fichier du modèle")
+    args = parser.parse_args()
+
+    samples, labels = load_training_set(ImageProcessor(projection_path=None), args.faces_dir)
+    if len(samples) == 0:
+        print("Aucun visage trouvé pour l'entraînement")
+        return
+
+    projection = FaceProjection.fit(samples, labels, args.components, args.lda)
+    projection.save(args.output)
+    print(f"Modèle {projection.model_id} enregistré dans {args.output} "
+          f"({len(samples)} visages, {projection.input_dim} -> {projection.output_dim} dimensions)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,50 @@
-import cv2
 import numpy as np
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
-import pickle
-import os
 import time
+from src.face_gallery import FaceGallery
+from src.face_tracker import FaceTracker
+from src.face_detection import FrameDetector
+from src.frame_grabber import FrameGrabber
+from src.frame_scheduler import FrameScheduler
+from src.recognition_pipeline import FrameAnalyzer, RecognitionPipeline
+from src.motion_gate import MotionGate
+from src.preview_renderer import PreviewRenderer
+from settings import Settings
 
 class FaceRecognition:
-    def __init__(self, db_connection, image_processor, ui_manager):
+    def __init__(self, db_connection, image_processor, ui_manager, gallery=None):
         self.db = db_connection
         self.image_processor = image_processor
         self.ui_manager = ui_manager
+        # Galerie partagée entre update_camera et capture_face
+        self.gallery = gallery if gallery is not None else FaceGallery(db_connection, image_processor)
         self.cap = None
-        self.last_detection_time = 0
+        # Heure du dernier marquage de présence de chaque étudiant
+        self.last_detection_times = {}
         self.detection_cooldown = 20
+        # Seuils propres à la mesure de similarité de l'extracteur (voir Settings)
+        self.recognition_threshold = Settings.RECOGNITION_THRESHOLDS[self.gallery.metric]
+        self.capture_threshold = Settings.CAPTURE_THRESHOLDS[self.gallery.metric]
+        # Le détecteur ne tourne pas à chaque image : les visages sont suivis entre deux détections
+        tracker = FaceTracker(FrameDetector(image_processor.detect_faces))
+        # Ni détection ni recherche tant que la scène reste immobile et qu'aucun visage n'est suivi
+        motion_gate = MotionGate() if Settings.MOTION_GATE else None
+        self.analyzer = FrameAnalyzer(image_processor, self.gallery, tracker, self.recognition_threshold,
+                                      motion_gate)
+        # Créé au démarrage de la caméra
+        self.pipeline = None
+        # Prochain passage programmé de update_camera
+        self._after_id = None
+        # Cadences d'analyse et d'aperçu, adaptées à la charge mesurée
+        self.scheduler = FrameScheduler()
 
     def setup_ui(self, parent_frame):
         self.parent_frame = parent_frame
         self.camera_label = ttk.Label(parent_frame)
         self.camera_label.pack(pady=10)
+        # Une seule PhotoImage, mise à jour en place à chaque image
+        self.renderer = PreviewRenderer(self.camera_label)
         
         self.confidence_label = ttk.Label(parent_frame, text="Correspondance: ---%", font=('Arial', 12))
         self.confidence_label.pack(pady=5)
@@ -28,100 +53,85 @@ class FaceRecognition:
 
     def update_camera(self):
         if self.cap is not None and not hasattr(self, '_stopping'):
-            ret, frame = self.cap.read()
+            started = time.perf_counter()
+            recognize, preview = self.scheduler.due(started)
+            ret = False
+            if recognize or preview:
+                # Image la plus récente du thread de capture, sans bloquer l'interface
+                ret, frame = self.cap.read(timeout=0)
             if ret:
-                try:
-                    # Process face and update confidence
-                    face_coords = self.image_processor.detect_face(frame)
-                    face_features = self.image_processor.extract_features(frame, face_coords)
-                    
-                    # Get database faces and find best match
-                    results = self.db.execute_query("""
-                        SELECT e.nom_famille, e.prenom, f.face_encoding, c.nom_classe
-                        FROM Etudiants e
-                        JOIN FaceFeatures f ON e.id = f.etudiant_id
-                        JOIN Classe c ON e.id_classe = c.id
-                    """)
-                    
-                    highest_confidence = 0
-                    best_name = ""
-                    best_class = ""
-                    
-                    for result in results:
-                        try:
-                            stored_encoding = pickle.loads(result[2])
-                            confidence = self.compare_faces(face_features, stored_encoding)
-                            if confidence > highest_confidence:
-                                highest_confidence = confidence
-                                best_name = f"{result[1]} {result[0]}"
-                                best_class = result[3]
-                        except Exception as e:
-                            print(f"Error processing encoding: {e}")
-                    
-                    # Update confidence label if it still exists
-                    if hasattr(self, 'confidence_label') and self.confidence_label.winfo_exists():
-                        current_time = time.time()
-                        if highest_confidence >= 90 and (current_time - self.last_detection_time) >= self.detection_cooldown:
-                            message = f"Visage détecté : {best_name}, {best_class}"
-                            self.confidence_label.config(
-                                text=message,
-                                foreground='green'
-                            )
-                            
-                            # Créer les données de l'étudiant pour la présence
-                            nom, prenom = best_name.split(' ', 1)
-                            student_data = {
-                                'nom': nom,
-                                'prenom': prenom,
-                                'classe_nom': best_class,
-                                'classe_id': self.get_class_id(best_class),
-                                'date': time.strftime('%Y-%m-%d'),
-                                'heure': time.strftime('%H:%M')
-                            }
-                            
-                            # Marquer l'étudiant comme présent
-                            self.ui_manager.mark_student_present(student_data)
-                            
-                            self.last_detection_time = current_time
-                            
-                    elif highest_confidence > 0:
-                        self.confidence_label.config(
-                            text=f"Correspondance: {highest_confidence:.1f}%",
-                            foreground='black'
-                        )
-                    else:
-                            self.confidence_label.config(
-                                text="Aucun visage détecté",
-                                foreground='black'
-                            )
-                    
-                except ValueError:
-                    # No face detected - update label if it exists
-                    if hasattr(self, 'confidence_label') and self.confidence_label.winfo_exists():
-                        self.confidence_label.config(text="Aucun visage détecté", foreground='black')
-                except Exception as e:
-                    print(f"Error in face recognition: {e}")
+                if recognize:
+                    # La reconnaissance se fait hors de la boucle Tk ; si l'analyseur est
+                    # occupé, seule l'image la plus récente attend son tour
+                    self.pipeline.submit(frame, self.get_class_scope())
                 
                 # Update camera display
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                image = Image.fromarray(frame_rgb)
-                image = image.resize((640, 480))
-                self.photo = ImageTk.PhotoImage(image=image)
-                
-                if hasattr(self, 'camera_label') and self.camera_label.winfo_exists():
-                    self.camera_label.configure(image=self.photo)
-                    self.parent_frame.after(10, self.update_camera)
+                if preview and hasattr(self, 'camera_label') and self.camera_label.winfo_exists():
+                    self.renderer.render(frame)
+            
+            for result in self.pipeline.poll():
+                self.apply_result(result)
+            self.scheduler.record_iteration(started, ret and recognize, ret and preview)
+            
+            # Sans nouvelle image (caméra momentanément lente), on réessaie tant que la capture tourne
+            if (ret or self.cap.running) and hasattr(self, 'camera_label') and self.camera_label.winfo_exists():
+                waiting = (recognize or preview) and not ret
+                self._after_id = self.parent_frame.after(self.scheduler.next_delay(waiting), self.update_camera)
+
+    def apply_result(self, result):
+        """Applique dans l'interface le résultat de l'analyse d'une image"""
+        if isinstance(result, Exception):
+            print(f"Error in face recognition: {result}")
+            return
+        self.scheduler.record_recognition(result['elapsed'])
+        
+        current_time = time.time()
+        for student_id, student_data in result['decided']:
+            # Délai propre à chaque étudiant : plusieurs élèves peuvent passer ensemble
+            if current_time - self.last_detection_times.get(student_id, 0) < self.detection_cooldown:
+                continue
+            # Marquer l'étudiant comme présent
+            self.ui_manager.mark_student_present(student_data)
+            self.last_detection_times[student_id] = current_time
+        
+        # Update confidence label if it still exists
+        if hasattr(self, 'confidence_label') and self.confidence_label.winfo_exists():
+            if result['labels']:
+                self.confidence_label.config(
+                    text=f"Visage détecté : {' | '.join(result['labels'])}",
+                    foreground='green'
+                )
+            elif result['highest_confidence'] > 0:
+                self.confidence_label.config(
+                    text=f"Correspondance: {result['highest_confidence']:.1f}%",
+                    foreground='black'
+                )
+            else:
+                self.confidence_label.config(
+                    text="Aucun visage détecté",
+                    foreground='black'
+                )
 
     def start_camera(self):
-        self.cap = cv2.VideoCapture(0)
+        # Une seule capture à la fois : celle d'une visite précédente de l'écran est libérée
+        self.stop_camera()
+        self.analyzer.reset()
+        self.scheduler.reset()
+        if self.pipeline is None:
+            self.pipeline = RecognitionPipeline(self.analyzer, use_local=getattr(self.db, 'use_local', True))
+        self.cap = FrameGrabber().start()
         self.update_camera()
 
     def process_image(self, image_path):
         face_coords = self.image_processor.detect_face(image_path)
+        # Pixels bruts enregistrés quel que soit l'extracteur courant : ils sont convertis
+        # au chargement de la galerie, et restent utilisables après un nouvel entraînement
+        # de la projection ou un changement de FACE_EXTRACTOR
         return {
             'path': image_path,
             'coords': face_coords,
-            'encoding': self.image_processor.extract_features(image_path, face_coords)
+            'encoding': self.image_processor.extract_raw_features(image_path, face_coords),
+            'extractor': self.image_processor.EXTRACTOR_ID
         }
 
     def save_student(self, student_data, image_data):
@@ -146,33 +156,18 @@ class FaceRecognition:
                     face_coords = self.image_processor.detect_face(frame)
                     face_features = self.image_processor.extract_features(frame, face_coords)
                     
-                    # Get database faces
-                    results = self.db.execute_query("""
-                        SELECT e.nom_famille, e.prenom, f.face_encoding, c.nom_classe
-                        FROM Etudiants e
-                        JOIN FaceFeatures f ON e.id = f.etudiant_id
-                        JOIN Classe c ON e.id_classe = c.id
-                    """)
-                    
-                    # Find best match
-                    best_match = None
-                    highest_confidence = 0
-                    
-                    for result in results:
-                        stored_encoding = pickle.loads(result[2])
-                        confidence = self.compare_faces(face_features, stored_encoding)
-                        
-                        if confidence > highest_confidence:
-                            highest_confidence = confidence
-                            best_match = result
+                    # Find best match in the cached gallery
+                    gallery = self.gallery.ensure_loaded()
+                    best_index, highest_confidence = self.match(face_features, gallery, self.get_class_scope(),
+                                                                self.capture_threshold)
                     
                     # Show results
-                    if highest_confidence > 60:
+                    if highest_confidence > self.capture_threshold:
                         messagebox.showinfo("Reconnaissance Réussie", 
                             f"Étudiant identifié :\n"
-                            f"Nom : {best_match[0] if best_match else 'Non reconnu'}\n"
-                            f"Prénom : {best_match[1] if best_match else 'Non reconnu'}\n"
-                            f"Classe : {best_match[3] if best_match else 'Non reconnu'}\n"
+                            f"Nom : {gallery.noms[best_index]}\n"
+                            f"Prénom : {gallery.prenoms[best_index]}\n"
+                            f"Classe : {gallery.class_names[best_index]}\n"
                             f"Confiance : {highest_confidence:.2f}%"
                         )
                     else:
@@ -183,6 +178,25 @@ class FaceRecognition:
                 except Exception as e:
                     messagebox.showerror("Erreur", str(e))
 
+    def get_class_scope(self):
+        """Classe sélectionnée dans le filtre de l'écran de reconnaissance, ou None"""
+        classe_filter = getattr(self.ui_manager, 'classe_filter', None)
+        try:
+            class_name = classe_filter.get() if classe_filter is not None else ''
+        except tk.TclError:
+            return None
+        if not class_name or class_name == 'Toutes les classes':
+            return None
+        return class_name
+
+    def match(self, face_features, gallery, class_name=None, fallback_threshold=None):
+        """Retourne (index, confiance) du meilleur encodage de la galerie"""
+        try:
+            return gallery.best_match(face_features, class_name, fallback_threshold)
+        except Exception as e:
+            print(f"Error in match: {e}")
+            return None, 0
+
     def compare_faces(self, face1_features, face2_features):
         try:
             face1 = np.array(face1_features).flatten()
@@ -215,9 +229,19 @@ class FaceRecognition:
             return 0
 
     def stop_camera(self):
+        """Libère la caméra et l'analyseur (à appeler en quittant l'écran de reconnaissance)"""
+        if self._after_id is not None:
+            try:
+                self.parent_frame.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
         if self.cap is not None:
             self.cap.release()
             self.cap = None
+        if self.pipeline is not None:
+            self.pipeline.shutdown()
+            self.pipeline = None
 
     def get_class_id(self, class_name):
         result = self.db.execute_query(
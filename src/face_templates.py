@@ -0,0 +1,146 @@
+import numpy as np
+from src import face_matcher
+
+# Nombre maximal d'itérations de l'algorithme des k-médoïdes
+MEDOID_ITERATIONS = 10
+
+
+def k_medoids(unit_vectors, k):
+    """Indices des k médoïdes d'un petit ensemble de vecteurs de norme 1 (distance cosinus)"""
+    distances = 1 - unit_vectors @ unit_vectors.T
+    # Initialisation : point le plus central, puis ajout successif du point le plus éloigné
+    medoids = [int(np.argmin(distances.sum(axis=1)))]
+    while len(medoids) < k:
+        medoids.append(int(np.argmax(distances[:, medoids].min(axis=1))))
+
+    medoids = np.array(medoids)
+    for _ in range(MEDOID_ITERATIONS):
+        assignments = np.argmin(distances[:, medoids], axis=1)
+        updated = medoids.copy()
+        for cluster in range(k):
+            members = np.flatnonzero(assignments == cluster)
+            if len(members):
+                within = distances[np.ix_(members, members)].sum(axis=1)
+                updated[cluster] = members[np.argmin(within)]
+        if np.array_equal(updated, medoids):
+            break
+        medoids = updated
+    return medoids
+
+
+class StudentTemplates:
+    """Modèles agrégés par étudiant pour ne comparer qu'un nombre limité de vecteurs par élève.
+
+    Mode 'mean' : un modèle par étudiant, moyenne de ses vecteurs.
+    Mode 'medoids' : jusqu'à k images représentatives par étudiant (k-médoïdes).
+    """
+
+    def __init__(self, mode='mean', medoids=3):
+        if mode not in ('mean', 'medoids'):
+            raise ValueError(f"Unknown template mode: {mode}")
+        self.mode = mode
+        self.medoids = medoids
+        self.prepared = None
+        # Ligne d'image représentative de chaque modèle (pour retrouver l'étudiant)
+        self.template_rows = np.empty(0, dtype=np.int64)
+        # Lignes de modèles et lignes d'images de chaque étudiant
+        self.rows_by_student = {}
+        self.images_by_student = {}
+
+    def __len__(self):
+        return len(self.template_rows)
+
+    def build(self, image_prepared, student_ids):
+        self.rows_by_student = {}
+        self.images_by_student = {}
+        self.add_images(np.arange(len(student_ids)), student_ids)
+
+        vectors, template_rows = [], []
+        for student_id, image_rows in self.images_by_student.items():
+            student_vectors, representatives = self._aggregate(image_prepared, image_rows)
+            self.rows_by_student[student_id] = list(range(len(template_rows), len(template_rows) + len(representatives)))
+            vectors.extend(student_vectors)
+            template_rows.extend(representatives)
+
+        self.template_rows = np.asarray(template_rows, dtype=np.int64)
+        matrix = np.vstack(vectors) if vectors else np.empty((0, 0))
+        self.prepared = face_matcher.prepare_gallery(matrix, image_prepared.metric)
+        return self
+
+    def restore(self, image_prepared, student_ids, template_rows):
+        """Reconstruit les modèles dans l'ordre enregistré de template_rows.
+
+        update() ajoute les nouveaux modèles à la fin alors que build() les regroupe
+        par étudiant : l'ordre enregistré est repris pour que les lignes d'un index
+        construit sur ces modèles restent valables. Retourne False si template_rows
+        ne correspond pas à la galerie d'images (build() doit alors être utilisé).
+        """
+        template_rows = np.asarray(template_rows, dtype=np.int64)
+        if len(template_rows) and (template_rows.min() < 0 or template_rows.max() >= len(student_ids)):
+            return False
+        self.rows_by_student = {}
+        self.images_by_student = {}
+        self.add_images(np.arange(len(student_ids)), student_ids)
+        for row, image_row in enumerate(template_rows):
+            self.rows_by_student.setdefault(int(student_ids[image_row]), []).append(row)
+        for student_id, image_rows in self.images_by_student.items():
+            expected = 1 if self.mode == 'mean' else min(len(image_rows), self.medoids)
+            if len(self.rows_by_student.get(student_id, ())) != expected:
+                return False
+
+        if self.mode == 'mean':
+            vectors = [image_prepared.feature_vectors(np.asarray(self.images_by_student[int(student_ids[row])])).mean(axis=0)
+                       for row in template_rows]
+            matrix = np.vstack(vectors) if vectors else np.empty((0, 0))
+        else:
+            # Les médoïdes sont des images de la galerie
+            matrix = image_prepared.feature_vectors(template_rows)
+        self.template_rows = template_rows
+        self.prepared = face_matcher.prepare_gallery(matrix, image_prepared.metric)
+        return True
+
+    def add_images(self, image_rows, student_ids):
+        for row, student_id in zip(image_rows, student_ids):
+            self.images_by_student.setdefault(int(student_id), []).append(int(row))
+
+    def update(self, image_prepared, new_rows, student_ids):
+        """Recalcule uniquement les modèles des étudiants ayant reçu de nouvelles images.
+
+        Retourne (lignes remplacées, nombre de lignes ajoutées à la fin).
+        """
+        self.add_images(new_rows, student_ids[new_rows])
+        replaced_rows, replaced_vectors, added_vectors, added_rows = [], [], [], []
+        for student_id in {int(s) for s in student_ids[new_rows]}:
+            vectors, representatives = self._aggregate(image_prepared, self.images_by_student[student_id])
+            existing = self.rows_by_student.setdefault(student_id, [])
+            # Le nombre de modèles d'un étudiant ne fait qu'augmenter : on remplace
+            # les lignes existantes et on ajoute les suivantes à la fin
+            for i, (vector, representative) in enumerate(zip(vectors, representatives)):
+                if i < len(existing):
+                    replaced_rows.append(existing[i])
+                    replaced_vectors.append(vector)
+                    self.template_rows[existing[i]] = representative
+                else:
+                    existing.append(len(self.template_rows) + len(added_rows))
+                    added_vectors.append(vector)
+                    added_rows.append(representative)
+
+        replaced_rows = np.asarray(replaced_rows, dtype=np.int64)
+        if len(replaced_rows):
+            self.prepared.replace_rows(replaced_rows, np.vstack(replaced_vectors))
+        if added_rows:
+            added = np.vstack(added_vectors)
+            self.prepared = self.prepared.extend(added) if len(self) else face_matcher.prepare_gallery(added, image_prepared.metric)
+            self.template_rows = np.concatenate([self.template_rows, added_rows])
+        return replaced_rows, len(added_rows)
+
+    def _aggregate(self, image_prepared, image_rows):
+        image_rows = np.asarray(image_rows, dtype=np.int64)
+        vectors = image_prepared.feature_vectors(image_rows)
+        if self.mode == 'mean' or len(image_rows) <= self.medoids:
+            if self.mode == 'mean':
+                return [vectors.mean(axis=0)], [image_rows[0]]
+            return list(vectors), list(image_rows)
+
+        medoids = k_medoids(image_prepared.subset(image_rows).unit_vectors(), self.medoids)
+        return list(vectors[medoids]), list(image_rows[medoids])
@@ -0,0 +1,157 @@
+import cv2
+from collections import deque
+from settings import Settings
+
+# Recouvrement minimal pour rattacher une détection à un visage déjà suivi
+# (et lui conserver son identité)
+MIN_TRACK_IOU = 0.3
+
+
+def iou(box_a, box_b):
+    """Rapport intersection / union de deux boîtes (x, y, w, h)"""
+    ax, ay, aw, ah = box_a
+    bx, by, bw, bh = box_b
+    overlap_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    overlap_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    overlap = overlap_w * overlap_h
+    union = aw * ah + bw * bh - overlap
+    return overlap / union if union > 0 else 0.0
+
+
+class IdentityVote:
+    """Identité d'un visage suivi, décidée par vote sur les dernières images.
+
+    Chaque image apporte l'étudiant reconnu (ou None sous le seuil) ; l'identité est
+    décidée dès qu'un même étudiant obtient min_votes voix parmi les window
+    dernières, puis conservée pour toute la durée du suivi.
+    """
+
+    def __init__(self, window=None, min_votes=None):
+        self.votes = deque(maxlen=window or Settings.VOTE_WINDOW)
+        self.min_votes = min_votes or Settings.VOTE_MIN_AGREEMENT
+        # Identité retenue (identifiant de l'étudiant)
+        self.student_id = None
+        # Nom affiché pour ce visage une fois l'identité décidée
+        self.label = None
+
+    @property
+    def decided(self):
+        return self.student_id is not None
+
+    def add(self, student_id, confidence):
+        """Ajoute le résultat d'une image ; retourne True si l'identité vient d'être décidée"""
+        if self.decided:
+            return False
+        self.votes.append((student_id, confidence))
+        if student_id is None:
+            return False
+        if sum(1 for s, _ in self.votes if s == student_id) < self.min_votes:
+            return False
+        self.student_id = student_id
+        return True
+
+
+class Track:
+    """Visage suivi d'une image à l'autre"""
+
+    def __init__(self, track_id, box, gray):
+        self.id = track_id
+        self.box = tuple(int(v) for v in box)
+        # Score de la dernière mise en correspondance (1 juste après une détection)
+        self.score = 1.0
+        # Nombre d'images depuis la création du suivi
+        self.age = 0
+        # Identité reconnue, conservée tant que le visage reste suivi
+        self.identity = IdentityVote()
+        self.set_template(gray)
+
+    def set_template(self, gray):
+        x, y, w, h = self.box
+        self.template = gray[y:y + h, x:x + w].copy()
+
+
+class FaceTracker:
+    """Détection puis suivi : le détecteur ne tourne que toutes les redetect_interval images.
+
+    Entre deux détections, chaque visage est suivi par corrélation de son modèle
+    (matchTemplate) dans une petite région autour de sa position précédente. Une
+    nouvelle détection est forcée dès qu'un suivi devient incertain ou qu'aucun
+    visage n'est suivi.
+    """
+
+    def __init__(self, detect, redetect_interval=None, min_score=None, search_margin=None):
+        # detect(gray, regions) -> liste de boîtes (x, y, w, h), regions étant les
+        # boîtes des visages suivis (voir FrameDetector)
+        self.detect = detect
+        # 0 ou 1 : détection à chaque image (suivi désactivé)
+        self.redetect_interval = Settings.TRACK_REDETECT_INTERVAL if redetect_interval is None else redetect_interval
+        self.min_score = Settings.TRACK_MIN_SCORE if min_score is None else min_score
+        # Marge de recherche autour de la boîte précédente, en fraction de sa taille
+        self.search_margin = Settings.TRACK_SEARCH_MARGIN if search_margin is None else search_margin
+        self.tracks = []
+        self._next_id = 1
+        self._frames_since_detection = 0
+        # Compteurs pour les statistiques (banc d'essai)
+        self.detections = 0
+        self.frames = 0
+
+    def reset(self):
+        self.tracks = []
+        self._frames_since_detection = 0
+
+    def update(self, frame):
+        """Retourne les suivis actifs pour cette image (BGR ou niveaux de gris)"""
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self.frames += 1
+        self._frames_since_detection += 1
+
+        if self._needs_detection() or not self._follow(gray):
+            self._redetect(gray)
+        for track in self.tracks:
+            track.age += 1
+        return self.tracks
+
+    def _needs_detection(self):
+        return (self.redetect_interval <= 1 or not self.tracks
+                or self._frames_since_detection >= self.redetect_interval)
+
+    def _follow(self, gray):
+        # Suit chaque visage ; retourne False si l'un d'eux est perdu
+        frame_h, frame_w = gray.shape
+        for track in self.tracks:
+            x, y, w, h = track.box
+            margin_x, margin_y = int(w * self.search_margin), int(h * self.search_margin)
+            left, top = max(0, x - margin_x), max(0, y - margin_y)
+            right, bottom = min(frame_w, x + w + margin_x), min(frame_h, y + h + margin_y)
+            th, tw = track.template.shape
+            if right - left < tw or bottom - top < th:
+                return False
+
+            scores = cv2.matchTemplate(gray[top:bottom, left:right], track.template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, location = cv2.minMaxLoc(scores)
+            track.score = score
+            if score < self.min_score:
+                return False
+            track.box = (left + location[0], top + location[1], w, h)
+        return True
+
+    def _redetect(self, gray):
+        boxes = [tuple(int(v) for v in box) for box in self.detect(gray, [track.box for track in self.tracks])]
+        self.detections += 1
+        self._frames_since_detection = 0
+
+        # Association glouton des détections aux suivis existants (meilleur recouvrement)
+        tracks = []
+        remaining = list(self.tracks)
+        for box in boxes:
+            best = max(remaining, key=lambda track: iou(track.box, box), default=None)
+            if best is not None and iou(best.box, box) >= MIN_TRACK_IOU:
+                remaining.remove(best)
+                best.box = box
+                best.score = 1.0
+                best.set_template(gray)
+                tracks.append(best)
+            else:
+                tracks.append(Track(self._next_id, box, gray))
+                self._next_id += 1
+        self.tracks = tracks
@@ -0,0 +1,132 @@
+import threading
+import time
+import cv2
+from settings import Settings
+
+
+class FrameGrabber:
+    """Lecture de la caméra (ou d'un fichier vidéo) dans un thread dédié.
+
+    Les images sont écrites dans un petit tampon circulaire ; read() retourne
+    toujours l'image la plus récente, les images qui n'ont pas été lues à temps
+    sont abandonnées (et comptées). Même interface que cv2.VideoCapture pour
+    read() et release().
+    """
+
+    def __init__(self, source=None, width=None, height=None, fourcc=None, buffer_size=None,
+                 ring_size=None, realtime=None):
+        source = Settings.CAMERA_SOURCE if source is None else source
+        # Numéro de caméra ou chemin d'un fichier vidéo
+        self.source = int(source) if str(source).isdigit() else source
+        self.width = Settings.CAMERA_WIDTH if width is None else width
+        self.height = Settings.CAMERA_HEIGHT if height is None else height
+        self.fourcc = Settings.CAMERA_FOURCC if fourcc is None else fourcc
+        self.buffer_size = Settings.CAMERA_BUFFER_SIZE if buffer_size is None else buffer_size
+        # Au moins 3 cases : l'image en cours d'écriture, la plus récente et celle lue par le consommateur
+        self.ring = [None] * max(3, Settings.FRAME_RING_SIZE if ring_size is None else ring_size)
+        # Un fichier vidéo est lu à sa cadence nominale, comme une caméra
+        self.realtime = not isinstance(self.source, int) if realtime is None else realtime
+
+        self.capture = None
+        self.running = False
+        self._thread = None
+        self._condition = threading.Condition()
+        self._newest = None   # case de l'image la plus récente
+        self._held = None     # case de la dernière image remise au consommateur
+        self._newest_id = 0
+        self._read_id = 0
+
+        # Compteurs : images capturées, abandonnées sans avoir été lues, cadence mesurée
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.fps = 0.0
+
+    def start(self):
+        self.capture = cv2.VideoCapture(self.source)
+        if self.fourcc:
+            self.capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        if self.width and self.height:
+            self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.buffer_size:
+            # Limite les images en attente dans le pilote (ignoré par certains backends)
+            self.capture.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+
+        self.running = self.capture.isOpened()
+        if self.running:
+            self._thread = threading.Thread(target=self._run, name='FrameGrabber', daemon=True)
+            self._thread.start()
+        return self
+
+    def isOpened(self):
+        return self.running
+
+    def _run(self):
+        frame_interval = 0
+        if self.realtime:
+            fps = self.capture.get(cv2.CAP_PROP_FPS)
+            frame_interval = 1.0 / fps if fps and fps > 0 else 0
+        last_time = time.perf_counter()
+        next_time = last_time
+
+        while self.running:
+            with self._condition:
+                # Case libre : ni la plus récente, ni celle que le consommateur utilise encore
+                slot = next(i for i in range(len(self.ring)) if i not in (self._newest, self._held))
+            ret, frame = self.capture.read(self.ring[slot])
+            if not ret:
+                break
+
+            now = time.perf_counter()
+            elapsed = now - last_time
+            last_time = now
+            if elapsed > 0:
+                # Moyenne glissante de la cadence de capture
+                self.fps = 1.0 / elapsed if self.fps == 0 else 0.9 * self.fps + 0.1 / elapsed
+
+            with self._condition:
+                self.ring[slot] = frame
+                if self._newest_id > self._read_id:
+                    self.frames_dropped += 1
+                self._newest = slot
+                self._newest_id += 1
+                self.frames_captured += 1
+                self._condition.notify_all()
+
+            if frame_interval:
+                next_time += frame_interval
+                time.sleep(max(0.0, next_time - time.perf_counter()))
+
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
+
+    def read(self, timeout=None):
+        """Retourne (ret, image) : la plus récente image pas encore lue.
+
+        Attend au plus timeout secondes (CAMERA_READ_TIMEOUT par défaut) qu'une
+        nouvelle image arrive ; (False, None) si aucune n'est arrivée ou si la
+        capture est terminée. L'image reste valide jusqu'au prochain appel.
+        """
+        timeout = Settings.CAMERA_READ_TIMEOUT if timeout is None else timeout
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._newest_id > self._read_id or not self.running, timeout):
+                return False, None
+            if self._newest_id == self._read_id:
+                return False, None
+            self._held = self._newest
+            self._read_id = self._newest_id
+            return True, self.ring[self._held]
+
+    def stats(self):
+        """Compteurs de capture pour l'affichage ou les bancs d'essai"""
+        return {'fps': self.fps, 'captured': self.frames_captured, 'dropped': self.frames_dropped}
+
+    def release(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
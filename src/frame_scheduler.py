@@ -0,0 +1,119 @@
+import time
+from settings import Settings
+
+# Profils de cadence : images analysées et affichées par seconde, et part d'un cœur
+# que la boucle caméra (aperçu et reconnaissance) peut occuper
+POWER_PROFILES = {
+    'normal': {'recognition_fps': 10.0, 'preview_fps': 30.0, 'cpu_budget': 0.8},
+    # Portables sur batterie : cadences réduites et budget plus faible
+    'low_power': {'recognition_fps': 3.0, 'preview_fps': 10.0, 'cpu_budget': 0.3},
+}
+
+# Lissage des coûts mesurés et période de réajustement des cadences (s)
+COST_SMOOTHING = 0.2
+ADAPT_INTERVAL = 0.5
+# Les cadences ne remontent que si la charge repasse sous cette fraction du budget
+RECOVERY_MARGIN = 0.7
+# Facteur de baisse (ou de remontée) des cadences à chaque réajustement
+RATE_STEP = 0.8
+
+
+class FrameScheduler:
+    """Cadencement de la boucle caméra dans Tk.
+
+    Vise une cadence de reconnaissance et une cadence d'aperçu, mesure le coût de
+    chaque analyse et de chaque affichage, et calcule le délai avant le prochain
+    passage. Si la charge estimée dépasse le budget CPU, la cadence de
+    reconnaissance baisse d'abord (jusqu'à MIN_RECOGNITION_FPS), puis celle de
+    l'aperçu (jusqu'à MIN_PREVIEW_FPS) ; elles remontent dans l'ordre inverse
+    quand la charge redescend.
+
+    preview_only : aperçu seul, sans reconnaissance (fenêtre de prise de photo).
+    """
+
+    def __init__(self, recognition_fps=None, preview_fps=None, cpu_budget=None, profile=None,
+                 preview_only=False):
+        profile = profile or Settings.POWER_PROFILE
+        if profile not in POWER_PROFILES:
+            raise ValueError(f"Unknown power profile: {profile}")
+        defaults = POWER_PROFILES[profile]
+        self.profile = profile
+        self.preview_only = preview_only
+        # Cadences visées (0 dans les réglages : valeur du profil)
+        self.target_recognition_fps = recognition_fps or Settings.RECOGNITION_FPS or defaults['recognition_fps']
+        self.target_preview_fps = preview_fps or Settings.PREVIEW_FPS or defaults['preview_fps']
+        self.cpu_budget = cpu_budget or Settings.CPU_BUDGET or defaults['cpu_budget']
+        self.min_recognition_fps = min(Settings.MIN_RECOGNITION_FPS, self.target_recognition_fps)
+        self.min_preview_fps = min(Settings.MIN_PREVIEW_FPS, self.target_preview_fps)
+        self.reset()
+
+    def reset(self):
+        self.recognition_fps = self.target_recognition_fps
+        self.preview_fps = self.target_preview_fps
+        # Coûts moyens (s) d'une analyse et d'un passage avec affichage
+        self.recognition_cost = 0.0
+        self.preview_cost = 0.0
+        now = time.perf_counter()
+        self._next_recognition = float('inf') if self.preview_only else now
+        self._next_preview = now
+        self._next_adapt = now + ADAPT_INTERVAL
+
+    def due(self, now=None):
+        """(reconnaissance, aperçu) : ce qui doit être fait à ce passage"""
+        now = time.perf_counter() if now is None else now
+        return now >= self._next_recognition, now >= self._next_preview
+
+    def record_iteration(self, started, recognized, previewed):
+        """Enregistre un passage de la boucle commencé à started (perf_counter)"""
+        now = time.perf_counter()
+        # Prochaine échéance à partir de l'échéance précédente, sans rattraper le retard
+        if recognized:
+            self._next_recognition = max(self._next_recognition + 1.0 / self.recognition_fps, now)
+        if previewed:
+            self._next_preview = max(self._next_preview + 1.0 / self.preview_fps, now)
+            self.preview_cost = self._smooth(self.preview_cost, now - started)
+        if now >= self._next_adapt:
+            self._adapt()
+            self._next_adapt = now + ADAPT_INTERVAL
+
+    def record_recognition(self, seconds):
+        """Enregistre la durée d'une analyse (mesurée par le thread ou le processus de travail)"""
+        self.recognition_cost = self._smooth(self.recognition_cost, seconds)
+
+    @staticmethod
+    def _smooth(average, value):
+        return value if average == 0 else (1 - COST_SMOOTHING) * average + COST_SMOOTHING * value
+
+    def load(self):
+        """Part d'un cœur estimée aux cadences courantes"""
+        return self.recognition_fps * self.recognition_cost + self.preview_fps * self.preview_cost
+
+    def _adapt(self):
+        load = self.load()
+        if load > self.cpu_budget:
+            # Dégradation progressive : la détection d'abord, l'aperçu ensuite
+            if self.recognition_fps > self.min_recognition_fps and not self.preview_only:
+                self.recognition_fps = max(self.min_recognition_fps, self.recognition_fps * RATE_STEP)
+            elif self.preview_fps > self.min_preview_fps:
+                self.preview_fps = max(self.min_preview_fps, self.preview_fps * RATE_STEP)
+        elif load < self.cpu_budget * RECOVERY_MARGIN:
+            if self.preview_fps < self.target_preview_fps:
+                self.preview_fps = min(self.target_preview_fps, self.preview_fps / RATE_STEP)
+            elif self.recognition_fps < self.target_recognition_fps:
+                self.recognition_fps = min(self.target_recognition_fps, self.recognition_fps / RATE_STEP)
+
+    def next_delay(self, waiting=False):
+        """Délai (ms) avant le prochain passage.
+
+        waiting : une échéance n'a pas pu être tenue faute de nouvelle image ; on
+        réessaie après une courte pause plutôt qu'à l'échéance suivante.
+        """
+        if waiting:
+            return Settings.FRAME_RETRY_MS
+        delay = min(self._next_recognition, self._next_preview) - time.perf_counter()
+        return max(1, min(1000, int(delay * 1000)))
+
+    def stats(self):
+        """Cadences courantes et charge estimée, pour l'affichage ou les bancs d'essai"""
+        return {'recognition_fps': self.recognition_fps, 'preview_fps': self.preview_fps,
+                'load': self.load(), 'budget': self.cpu_budget}
@@ -2,19 +2,47 @@ import cv2
 import numpy as np
 from PIL import Image
 import os
+from src.face_projection import FaceProjection, DEFAULT_MODEL_PATH
+from src.lbp_features import lbp_histogram
+from src.face_detectors import create_detector
+from settings import Settings
 
 class ImageProcessor:
-    def __init__(self):
-        # Utiliser le fichier cascade local au lieu du chemin d'installation d'OpenCV
-        cascade_path = os.path.join(os.path.dirname(__file__), 'cascades', 'haarcascade_frontalface_default.xml')
-        if not os.path.exists(cascade_path):
-            raise FileNotFoundError(f"Haar cascade file not found at: {cascade_path}")
-            
-        self.face_cascade = cv2.CascadeClassifier(cascade_path)
-        if self.face_cascade.empty():
-            raise ValueError("Failed to load Haar cascade classifier")
+    # Identifiant enregistré avec chaque encodage (pixels bruts 128x128 en niveaux de gris)
+    EXTRACTOR_ID = 'raw128-v1'
+
+    def __init__(self, projection_path=DEFAULT_MODEL_PATH, extractor=None, detector=None):
+        # Détecteur de visages : 'haar' (cascade fournie dans src/cascades), 'lbp' ou 'dnn'
+        self.detector = create_detector(detector)
+        
+        # Extracteur de caractéristiques : 'raw' ou 'lbp'
+        self.extractor = extractor or Settings.FACE_EXTRACTOR
+        if self.extractor not in ('raw', 'lbp'):
+            raise ValueError(f"Unknown face extractor: {self.extractor}")
+        self.lbp_grid = tuple(Settings.LBP_GRID)
+        
+        # Projection Eigenfaces/Fisherfaces optionnelle, utilisée si le modèle est présent
+        self.projection = None
+        if self.extractor == 'raw' and projection_path and os.path.exists(projection_path):
+            self.projection = FaceProjection.load(projection_path)
     
-    def detect_face(self, image_input):
+    @property
+    def extractor_id(self):
+        # Identifiant de l'espace des caractéristiques produit par extract_features
+        if self.extractor == 'lbp':
+            return f"lbp-u2-{self.lbp_grid[0]}x{self.lbp_grid[1]}-v1"
+        return self.projection.model_id if self.projection is not None else self.EXTRACTOR_ID
+    
+    @property
+    def metric(self):
+        # Mesure de similarité adaptée aux caractéristiques produites
+        return Settings.LBP_METRIC if self.extractor == 'lbp' else 'cosine'
+    
+    def detect_faces(self, image_input, min_size=None, max_size=None):
+        """Retourne toutes les boîtes (x, y, w, h) détectées, éventuellement aucune.
+
+        min_size et max_size (largeur, hauteur) limitent les échelles parcourues.
+        """
         # Gérer à la fois les chemins de fichiers et les tableaux numpy
         if isinstance(image_input, str):
             image = cv2.imread(image_input)
@@ -23,8 +51,10 @@ class ImageProcessor:
         else:
             image = image_input
             
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+        return self.detector.detect(image, min_size, max_size)
+    
+    def detect_face(self, image_input):
+        faces = self.detect_faces(image_input)
         
         if len(faces) == 0:
             raise ValueError("No face detected in the image")
@@ -33,7 +63,7 @@ class ImageProcessor:
         
         return faces[0]  # Returns (x, y, w, h)
     
-    def extract_features(self, image_input, face_coords):
+    def extract_raw_features(self, image_input, face_coords):
         # Gérer à la fois les chemins de fichiers et les tableaux numpy
         if isinstance(image_input, str):
             image = cv2.imread(image_input)
@@ -44,7 +74,39 @@ class ImageProcessor:
         face = image[y:y+h, x:x+w]
         face_gray = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
         face_resized = cv2.resize(face_gray, (128, 128))
-        return face_resized.flatten().tolist()
+        return face_resized.flatten()
+    
+    def extract_features(self, image_input, face_coords):
+        return self.raw_to_features(self.extract_raw_features(image_input, face_coords))
+    
+    def extract_features_batch(self, image, faces_coords):
+        """Caractéristiques de plusieurs visages d'une même image, une ligne par visage"""
+        # Conversion en niveaux de gris une seule fois pour toute l'image
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        faces = np.empty((len(faces_coords), 128, 128), dtype=np.uint8)
+        for face, (x, y, w, h) in zip(faces, faces_coords):
+            cv2.resize(gray[y:y+h, x:x+w], (128, 128), dst=face)
+        return self.raw_to_features(faces.reshape(len(faces), -1))
+    
+    def raw_to_features(self, features):
+        # Calcule les caractéristiques courantes à partir des pixels bruts 128x128
+        # (un vecteur, ou une matrice d'une ligne par visage)
+        if self.extractor == 'lbp':
+            return lbp_histogram(features.reshape(-1, 128, 128) if features.ndim == 2
+                                 else features.reshape(128, 128), self.lbp_grid)
+        if self.projection is not None:
+            return self.projection.project(features)
+        return features
+    
+    def to_feature_space(self, features, extractor):
+        """Convertit un encodage stocké vers l'espace courant, ou retourne None si impossible"""
+        if extractor == self.extractor_id:
+            return features
+        # Les encodages bruts peuvent être convertis vers l'extracteur courant,
+        # ce qui permet aux deux formats de coexister dans FaceFeatures
+        if extractor == self.EXTRACTOR_ID:
+            return self.raw_to_features(np.asarray(features).ravel())
+        return None
     
     def save_face_image(self, image_path, student_data):
         # Créer le répertoire principal s'il n'existe pas
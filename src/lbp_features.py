@@ -0,0 +1,63 @@
+import numpy as np
+
+# Voisins du motif LBP (rayon 1), dans l'ordre des bits
+NEIGHBOR_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+
+
+def _uniform_lookup():
+    # Motifs uniformes (au plus deux transitions 0/1 circulaires) : 58 étiquettes,
+    # tous les autres motifs partagent la dernière étiquette
+    lookup = np.full(256, 58, dtype=np.intp)
+    label = 0
+    for code in range(256):
+        bits = [(code >> i) & 1 for i in range(8)]
+        transitions = sum(bits[i] != bits[(i + 1) % 8] for i in range(8))
+        if transitions <= 2:
+            lookup[code] = label
+            label += 1
+    return lookup
+
+
+UNIFORM_LOOKUP = _uniform_lookup()
+N_BINS = 59
+
+
+def uniform_lbp(gray):
+    """Étiquettes LBP uniformes d'une image (ou d'une pile d'images) en niveaux de gris.
+
+    Retourne un tableau de forme (..., h - 2, w - 2).
+    """
+    gray = np.asarray(gray, dtype=np.int16)
+    h, w = gray.shape[-2:]
+    center = gray[..., 1:h - 1, 1:w - 1]
+    codes = np.zeros(center.shape, dtype=np.uint8)
+    for bit, (dy, dx) in enumerate(NEIGHBOR_OFFSETS):
+        neighbor = gray[..., 1 + dy:h - 1 + dy, 1 + dx:w - 1 + dx]
+        codes |= (neighbor >= center).astype(np.uint8) << bit
+    return UNIFORM_LOOKUP[codes]
+
+
+def lbp_histogram(gray, grid=(4, 4)):
+    """Descripteur LBP : histogrammes uniformes concaténés sur une grille de cellules.
+
+    Accepte une image (h, w) ou une pile (n, h, w) ; le descripteur est normalisé
+    pour que la somme de ses valeurs vaille 1.
+    """
+    labels = uniform_lbp(gray)
+    single = labels.ndim == 2
+    if single:
+        labels = labels[None]
+
+    n, h, w = labels.shape
+    rows, cols = grid
+    # Indice de cellule de chaque pixel, combiné à l'étiquette pour un seul bincount
+    cell_y = np.minimum(np.arange(h) * rows // h, rows - 1)
+    cell_x = np.minimum(np.arange(w) * cols // w, cols - 1)
+    cells = (cell_y[:, None] * cols + cell_x[None, :]) * N_BINS
+    bins_per_image = rows * cols * N_BINS
+    offsets = np.arange(n)[:, None, None] * bins_per_image
+    flat = (offsets + cells[None] + labels).ravel()
+
+    histograms = np.bincount(flat, minlength=n * bins_per_image).reshape(n, bins_per_image)
+    histograms = histograms.astype(np.float32) / (h * w)
+    return histograms[0] if single else histograms
@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+from settings import Settings
+
+
+class MotionGate:
+    """Filtre de mouvement placé devant la détection.
+
+    Chaque image est réduite (width pixels de large) et passée en niveaux de gris,
+    puis comparée à un fond moyen mis à jour progressivement. La détection n'est
+    lancée que si une part suffisante de l'image a changé, si un visage est déjà
+    suivi, ou au moins toutes les max_idle images (personne immobile devant la
+    caméra dont le suivi a été perdu).
+    """
+
+    def __init__(self, width=None, threshold=None, min_area=None, learning_rate=None, max_idle=None):
+        self.width = width or Settings.MOTION_WIDTH
+        # Écart de niveau de gris à partir duquel un pixel a changé
+        self.threshold = Settings.MOTION_THRESHOLD if threshold is None else threshold
+        # Part minimale de pixels changés pour signaler un mouvement
+        self.min_area = Settings.MOTION_MIN_AREA if min_area is None else min_area
+        self.learning_rate = learning_rate or Settings.MOTION_LEARNING_RATE
+        self.max_idle = Settings.MOTION_MAX_IDLE if max_idle is None else max_idle
+        self.background = None
+        self._idle = 0
+        # Compteurs : images examinées et images sans analyse
+        self.frames = 0
+        self.skipped = 0
+
+    def reset(self):
+        self.background = None
+        self._idle = 0
+
+    def moved(self, frame):
+        """Met à jour le fond ; retourne True si la scène a changé"""
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, round(height * self.width / width)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        # Atténue le bruit du capteur avant la différence
+        small = cv2.GaussianBlur(small, (5, 5), 0)
+
+        if self.background is None or self.background.shape != small.shape:
+            self.background = small.astype(np.float32)
+            return True
+        difference = cv2.absdiff(small, cv2.convertScaleAbs(self.background))
+        changed = np.count_nonzero(difference > self.threshold) / difference.size
+        cv2.accumulateWeighted(small, self.background, self.learning_rate)
+        return changed >= self.min_area
+
+    def should_analyze(self, frame, tracking=False):
+        """True si l'image doit passer par la détection et la reconnaissance"""
+        self.frames += 1
+        # Le fond est mis à jour à chaque image, même pendant le suivi
+        if self.moved(frame) or tracking or (self.max_idle and self._idle >= self.max_idle):
+            self._idle = 0
+            return True
+        self._idle += 1
+        self.skipped += 1
+        return False
@@ -0,0 +1,41 @@
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+
+class PreviewRenderer:
+    """Affichage de l'aperçu caméra dans un label Tk sans allocation par image.
+
+    L'image est redimensionnée par OpenCV dans un tampon préalloué (étape sautée si
+    la capture a déjà la bonne taille), convertie en RGBA dans un second tampon, puis
+    copiée dans une unique PhotoImage avec paste(). La cadence d'affichage est
+    décidée par FrameScheduler.
+    """
+
+    def __init__(self, label, size=(640, 480)):
+        self.label = label
+        self.size = size
+        width, height = size
+        self._resized = np.empty((height, width, 3), dtype=np.uint8)
+        # RGBA : seul un format 32 bits permet à PIL de partager la mémoire du tampon
+        self._rgba = np.full((height, width, 4), 255, dtype=np.uint8)
+        self._image = Image.frombuffer('RGBA', size, self._rgba, 'raw', 'RGBA', 0, 1)
+        self.photo = None
+
+    def render(self, frame):
+        """Affiche l'image BGR dans le label"""
+        self.convert(frame)
+        if self.photo is None:
+            self.photo = ImageTk.PhotoImage(image=self._image)
+            self.label.configure(image=self.photo)
+        else:
+            self.photo.paste(self._image)
+
+    def convert(self, frame):
+        """Redimensionne et convertit l'image dans le tampon préalloué ; retourne l'image PIL associée"""
+        width, height = self.size
+        if frame.shape[1] != width or frame.shape[0] != height:
+            cv2.resize(frame, self.size, dst=self._resized, interpolation=cv2.INTER_LINEAR)
+            frame = self._resized
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA, dst=self._rgba)
+        return self._image
@@ -0,0 +1,105 @@
+import numpy as np
+from src import face_matcher
+
+# Valeur entière maximale des codes (symétrique, -127 à 127)
+QUANT_LEVELS = 127
+# Nombre d'éléments convertis à la fois lors du calcul des scores approchés
+SCORE_CHUNK_ELEMENTS = 1 << 18
+
+
+def quantize(vectors):
+    """Codes int8 et facteur d'échelle par ligne de vecteurs de norme 1"""
+    vectors = np.atleast_2d(vectors)
+    scales = np.abs(vectors).max(axis=1) / QUANT_LEVELS
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, None]), -QUANT_LEVELS, QUANT_LEVELS).astype(np.int8)
+    return codes, scales
+
+
+class QuantizedIndex:
+    """Galerie quantifiée en int8 (un facteur d'échelle par modèle).
+
+    Les scores approchés sont calculés sur les codes entiers ; les meilleurs
+    candidats sont re-classés avec le score exact de face_matcher.
+    Même interface que IVFIndex pour FaceGallery.
+    """
+
+    def __init__(self, metric='cosine', rerank=32):
+        self.metric = metric
+        self.rerank = rerank
+        self.codes = np.empty((0, 0), dtype=np.int8)
+        self.scales = np.empty(0, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.scales)
+
+    @property
+    def params(self):
+        return ['int8', self.metric]
+
+    def build(self, prepared):
+        self.codes, self.scales = quantize(prepared.unit_vectors())
+        return self
+
+    def add(self, prepared_rows):
+        """Ajoute de nouveaux modèles à la suite des précédents"""
+        codes, scales = quantize(prepared_rows.unit_vectors())
+        self.codes = np.concatenate([self.codes, codes]) if len(self) else codes
+        self.scales = np.concatenate([self.scales, scales])
+
+    def update(self, rows, prepared_rows):
+        """Requantifie des modèles existants dont le vecteur a changé"""
+        codes, scales = quantize(prepared_rows.unit_vectors())
+        self.codes = self.codes.copy()
+        self.scales = self.scales.copy()
+        self.codes[rows] = codes
+        self.scales[rows] = scales
+
+    def scores(self, unit, rows=None):
+        """Produits scalaires approchés entre la requête (norme 1) et les modèles (tous, ou rows)"""
+        query_codes, query_scale = quantize(unit)
+        # Les codes sont élargis par blocs en float32 pour profiter de BLAS : chaque
+        # produit est un entier exact, seule la somme des très longs vecteurs est arrondie
+        query_codes = query_codes[0].astype(np.float32)
+        count = len(self) if rows is None else len(rows)
+        scores = np.empty(count, dtype=np.float32)
+        chunk = max(1, SCORE_CHUNK_ELEMENTS // max(self.codes.shape[1], 1))
+        for start in range(0, count, chunk):
+            block = slice(start, start + chunk) if rows is None else rows[start:start + chunk]
+            scores[start:start + chunk] = self.codes[block].astype(np.float32) @ query_codes
+        scales = self.scales if rows is None else self.scales[rows]
+        return scores * scales * query_scale[0]
+
+    def search(self, query, prepared, rerank=None, rows=None):
+        """Retourne (best_index, confiance) après re-classement exact des meilleurs scores approchés.
+
+        rows (triées) : recherche limitée à ces modèles (une classe) ; seuls les
+        candidats retenus sont lus dans prepared, qui peut être projeté en mémoire.
+        """
+        unit = face_matcher.unit_query(query, self.metric)
+        if unit is None or len(self) == 0 or (rows is not None and len(rows) == 0):
+            return None, 0
+
+        scores = self.scores(unit, rows)
+        rerank = min(rerank or self.rerank, len(scores))
+        candidates = np.argpartition(-scores, rerank - 1)[:rerank]
+        # Même ordre que la recherche exhaustive en cas d'égalité
+        candidates = np.sort(candidates)
+        if rows is not None:
+            candidates = np.asarray(rows)[candidates]
+        best_index, confidence = face_matcher.best_match(query, prepared.subset(candidates))
+        if best_index is None:
+            return None, 0
+        return int(candidates[best_index]), confidence
+
+    def to_arrays(self):
+        return {'params': np.array([str(p) for p in self.params]),
+                'codes': self.codes, 'scales': self.scales}
+
+    def load_arrays(self, arrays):
+        """Restaure un index enregistré ; retourne False si ses paramètres ont changé"""
+        if list(arrays['params']) != [str(p) for p in self.params]:
+            return False
+        self.codes = arrays['codes']
+        self.scales = arrays['scales']
+        return True
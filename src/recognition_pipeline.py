@@ -0,0 +1,191 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from settings import Settings
+
+
+class FrameAnalyzer:
+    """Suivi, extraction et identification des visages d'une image (sans accès à Tk).
+
+    Retourne pour chaque image un dictionnaire :
+    - 'labels' : noms des visages dont l'identité est décidée ;
+    - 'highest_confidence' : meilleure confiance des visages encore en cours de vote ;
+    - 'decided' : (student_id, student_data) des identités décidées sur cette image ;
+    - 'faces' : nombre de visages suivis ;
+    - 'elapsed' : durée de l'analyse en secondes.
+
+    Avec un filtre de mouvement (MotionGate), les images d'une scène immobile sans
+    visage suivi ne passent ni par la détection ni par la galerie.
+    """
+
+    def __init__(self, image_processor, gallery, tracker, threshold, motion_gate=None):
+        self.image_processor = image_processor
+        self.gallery = gallery
+        self.tracker = tracker
+        self.threshold = threshold
+        self.motion_gate = motion_gate
+
+    def reset(self):
+        self.tracker.reset()
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+
+    def analyze(self, frame, class_name=None):
+        started = time.perf_counter()
+        result = self._analyze(frame, class_name)
+        result['elapsed'] = time.perf_counter() - started
+        return result
+
+    def _analyze(self, frame, class_name):
+        if self.motion_gate is not None and not self.motion_gate.should_analyze(frame, bool(self.tracker.tracks)):
+            return {'labels': [], 'highest_confidence': 0, 'decided': [], 'faces': 0}
+
+        tracks = self.tracker.update(frame)
+        result = {'labels': [], 'highest_confidence': 0, 'decided': [], 'faces': len(tracks)}
+        if not tracks:
+            return result
+
+        # Seuls les visages dont l'identité n'est pas encore décidée sont
+        # recherchés dans la galerie, tous en un seul lot
+        gallery = self.gallery.ensure_loaded()
+        pending = [track for track in tracks if not track.identity.decided]
+        if pending:
+            faces_features = self.image_processor.extract_features_batch(frame, [t.box for t in pending])
+            try:
+                matches = gallery.best_matches(faces_features, class_name, self.threshold)
+            except Exception as e:
+                print(f"Error in match: {e}")
+                matches = [(None, 0)] * len(pending)
+
+            for track, (best_index, confidence) in zip(pending, matches):
+                result['highest_confidence'] = max(result['highest_confidence'], confidence)
+                recognized = best_index is not None and confidence >= self.threshold
+                student_id = int(gallery.ids[best_index]) if recognized else None
+                if not track.identity.add(student_id, confidence):
+                    continue
+
+                # Créer les données de l'étudiant pour la présence
+                student_data = {
+                    'nom': str(gallery.noms[best_index]),
+                    'prenom': str(gallery.prenoms[best_index]),
+                    'classe_nom': str(gallery.class_names[best_index]),
+                    'classe_id': int(gallery.class_ids[best_index]),
+                    'date': time.strftime('%Y-%m-%d'),
+                    'heure': time.strftime('%H:%M')
+                }
+                track.identity.label = f"{student_data['prenom']} {student_data['nom']}, {student_data['classe_nom']}"
+                result['decided'].append((student_id, student_data))
+
+        # Le nom est affiché tant que le visage reconnu reste suivi
+        result['labels'] = [track.identity.label for track in tracks if track.identity.decided]
+        return result
+
+
+# Analyseur propre à chaque processus de travail (mode 'process')
+_process_analyzer = None
+
+
+def _init_process_analyzer(use_local, threshold):
+    global _process_analyzer
+    from database.connection import DatabaseConnection
+    from src.face_detection import FrameDetector
+    from src.face_gallery import FaceGallery
+    from src.face_tracker import FaceTracker
+    from src.image_processor import ImageProcessor
+    from src.motion_gate import MotionGate
+
+    image_processor = ImageProcessor()
+    gallery = FaceGallery(DatabaseConnection(use_local=use_local), image_processor)
+    tracker = FaceTracker(FrameDetector(image_processor.detect_faces))
+    motion_gate = MotionGate() if Settings.MOTION_GATE else None
+    _process_analyzer = FrameAnalyzer(image_processor, gallery, tracker, threshold, motion_gate)
+
+
+def _analyze_in_process(frame, class_name):
+    return _process_analyzer.analyze(frame, class_name)
+
+
+class RecognitionPipeline:
+    """Reconnaissance hors de la boucle Tk.
+
+    Les images sont confiées à un thread ou à un processus de travail ; si
+    celui-ci est occupé, seule la dernière image soumise est gardée en attente
+    (les précédentes sont abandonnées). Les résultats sont déposés dans une file
+    que l'interface consulte avec poll().
+
+    Le suivi et le vote sur les identités dépendent de l'ordre des images : une
+    seule image est donc analysée à la fois.
+    """
+
+    def __init__(self, analyzer, mode=None, use_local=True):
+        self.mode = mode or Settings.RECOGNITION_EXECUTOR
+        if self.mode == 'thread':
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='Recognition')
+            self._analyze = analyzer.analyze
+        elif self.mode == 'process':
+            # Le processus construit son propre analyseur (galerie ouverte depuis l'instantané disque)
+            self.executor = ProcessPoolExecutor(max_workers=1, initializer=_init_process_analyzer,
+                                                initargs=(use_local, analyzer.threshold))
+            self._analyze = _analyze_in_process
+        else:
+            raise ValueError(f"Unknown recognition executor: {self.mode}")
+
+        self.results = queue.Queue()
+        self._lock = threading.Lock()
+        self._busy = False
+        self._pending = None
+        # Compteurs : images analysées et images remplacées avant d'avoir été analysées
+        self.frames_processed = 0
+        self.frames_skipped = 0
+
+    def submit(self, frame, class_name=None):
+        """Soumet une image ; retourne False si elle attend qu'un analyseur se libère"""
+        # Copie : l'image du tampon de capture sera réutilisée
+        job = (frame.copy(), class_name)
+        with self._lock:
+            if self._busy:
+                if self._pending is not None:
+                    self.frames_skipped += 1
+                self._pending = job
+                return False
+            self._busy = True
+        self._start(job)
+        return True
+
+    def _start(self, job):
+        try:
+            future = self.executor.submit(self._analyze, *job)
+        except RuntimeError as e:
+            # Pipeline arrêté ou processus de travail interrompu
+            self.results.put(e)
+            with self._lock:
+                self._busy = False
+            return
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        try:
+            self.results.put(future.result())
+        except Exception as e:
+            self.results.put(e)
+        with self._lock:
+            self.frames_processed += 1
+            job, self._pending = self._pending, None
+            self._busy = job is not None
+        if job is not None:
+            self._start(job)
+
+    def poll(self):
+        """Résultats disponibles (dictionnaires de FrameAnalyzer ou exceptions), sans attendre"""
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def shutdown(self):
+        with self._lock:
+            self._pending = None
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,82 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import DatabaseConnection
+from src.face_encoding import encode_features
+
+# Classes par défaut de la base locale avec des noms distincts
+CLASSES = ((3, 'Terminale'), (4, 'BTS Commerce'))
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Base SQLite temporaire (schéma et migrations appliqués à la première requête)"""
+    db = DatabaseConnection(use_local=True)
+    # Chemin absolu : get_data_directory() est ignoré par os.path.join
+    db.config['database'] = str(tmp_path / 'test.db')
+    yield db
+    db.close()
+
+
+def add_students(db, count):
+    """Crée count étudiants répartis entre deux classes ; retourne leurs identifiants"""
+    ids = []
+    with db.transaction() as transaction:
+        for i in range(count):
+            class_id = CLASSES[i % len(CLASSES)][0]
+            ids.append(transaction.execute(
+                """INSERT INTO Etudiants (nom_famille, prenom, id_classe, annee_scolaire)
+                   VALUES (%s, %s, %s, %s)""", (f"Nom{i}", f"Prenom{i}", class_id, '2024'))[0][0])
+    return ids
+
+
+def add_images(db, student_ids, encodings, extractor='raw128-v1'):
+    """Enregistre un encodage par (étudiant, vecteur), comme « Rajouter Image »"""
+    with db.transaction() as transaction:
+        start = transaction.execute("SELECT COUNT(*) FROM FaceFeatures")[0][0]
+        for n, (student_id, encoding) in enumerate(zip(student_ids, encodings)):
+            transaction.execute(
+                "INSERT INTO FaceFeatures (etudiant_id, image_path, face_encoding) VALUES (%s, %s, %s)",
+                (student_id, f"img_{start + n}.jpg", encode_features(np.asarray(encoding), extractor)))
+
+
+# Galerie synthétique partagée : dimension des encodages et nombre d'étudiants
+DIM = 64
+STUDENTS = 60
+
+
+@pytest.fixture
+def faces(db):
+    """Galerie synthétique : 2 à 5 images bruitées par étudiant.
+
+    Retourne (identifiants des étudiants, une requête par étudiant, append) ;
+    append() ajoute une image à un étudiant sur deux, comme « Rajouter Image ».
+    """
+    rng = np.random.default_rng(0)
+    centers = rng.normal(0, 1, (STUDENTS, DIM))
+    student_ids = add_students(db, STUDENTS)
+    counts = 2 + np.arange(STUDENTS) % 4
+    rows = np.repeat(np.arange(STUDENTS), counts)
+    add_images(db, [student_ids[s] for s in rows], centers[rows] + rng.normal(0, 0.3, (len(rows), DIM)))
+
+    def append():
+        added = np.arange(0, STUDENTS, 2)
+        add_images(db, [student_ids[s] for s in added], centers[added] + rng.normal(0, 0.3, (len(added), DIM)))
+
+    probes = centers + rng.normal(0, 0.3, centers.shape)
+    return student_ids, probes, append
+
+
+def search_results(gallery, probes):
+    """(étudiant, confiance) trouvés pour chaque requête, sans filtre puis dans sa classe"""
+    found = []
+    for i, probe in enumerate(probes):
+        class_name = CLASSES[i % len(CLASSES)][1]
+        for row, confidence in (gallery.best_match(probe), gallery.best_match(probe, class_name)):
+            found.append((None if row is None else int(gallery.ids[row]), round(confidence, 6)))
+    return found
@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pytest
+
+from settings import Settings
+from src.face_gallery import FaceGallery
+from src.image_processor import ImageProcessor
+from tests.conftest import STUDENTS, add_images, add_students, search_results
+
+@pytest.mark.parametrize('template_mode, quantized', [
+    ('medoids', False), ('medoids', True), ('mean', False), ('mean', True), ('image', True),
+])
+def test_append_then_reload_matches_fresh_build(db, faces, tmp_path, monkeypatch, template_mode, quantized):
+    # Index dès le premier modèle ; IVF exhaustif pour comparer au résultat exact
+    monkeypatch.setattr(Settings, 'GALLERY_QUANTIZED', quantized)
+    monkeypatch.setattr(Settings, 'ANN_MIN_GALLERY', 1)
+    monkeypatch.setattr(Settings, 'ANN_NPROBE', 10 ** 6)
+    student_ids, probes, append = faces
+    full_loads = []
+    original = FaceGallery.load_from_database
+    monkeypatch.setattr(FaceGallery, 'load_from_database',
+                        lambda self: full_loads.append(self) or original(self))
+
+    incremental = FaceGallery(db, template_mode=template_mode).ensure_loaded()
+    append()
+    incremental.invalidate()
+    incremental.ensure_loaded()
+    reloaded = FaceGallery(db, template_mode=template_mode).ensure_loaded()
+    # Ajout incrémental puis réouverture de l'instantané : un seul chargement complet
+    assert full_loads == [incremental]
+    assert incremental.index is not None and reloaded.index is not None
+
+    fresh = FaceGallery(db, snapshot_dir=str(tmp_path / 'fresh'), template_mode=template_mode).ensure_loaded()
+    expected = search_results(fresh, probes)
+    assert sum(found == student_id for (found, _), student_id in zip(expected[::2], student_ids)) == STUDENTS
+    assert search_results(incremental, probes) == expected
+    assert search_results(reloaded, probes) == expected
+
+
+def test_index_with_another_template_order_is_rebuilt(db, faces, tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, 'ANN_MIN_GALLERY', 1)
+    monkeypatch.setattr(Settings, 'ANN_NPROBE', 10 ** 6)
+    student_ids, probes, append = faces
+    gallery = FaceGallery(db, template_mode='medoids').ensure_loaded()
+    append()
+    gallery.invalidate()
+    gallery.ensure_loaded()
+
+    # Ordre enregistré perdu : les modèles sont regroupés par étudiant, l'empreinte de
+    # l'index enregistré ne correspond plus et il est reconstruit
+    os.remove(gallery._snapshot_file('template_rows'))
+    reloaded = FaceGallery(db, template_mode='medoids').ensure_loaded()
+    assert reloaded._index_order() != gallery._index_order()
+
+    fresh = FaceGallery(db, snapshot_dir=str(tmp_path / 'fresh'), template_mode='medoids').ensure_loaded()
+    assert search_results(reloaded, probes) == search_results(fresh, probes)
+
+
+def test_lbp_gallery_snapshot_stays_mapped(db, monkeypatch):
+    student_ids = add_students(db, 4)
+    rng = np.random.default_rng(2)
+    add_images(db, student_ids, rng.integers(0, 256, (4, 128 * 128), dtype=np.uint8))
+    image_processor = ImageProcessor(projection_path=None, extractor='lbp')
+    FaceGallery(db, image_processor).ensure_loaded()
+
+    # Histogrammes float32 relus dans l'instantané sans copie en mémoire
+    reloaded = FaceGallery(db, image_processor).ensure_loaded()
+    assert reloaded.matrix.dtype == np.float32
+    assert np.shares_memory(reloaded.prepared.histograms, reloaded.matrix)
+    assert reloaded.best_match(reloaded.matrix[2])[0] == 2
+
+
+def test_database_errors_propagate_without_dialog(tmp_path, monkeypatch):
+    # Appelée depuis le thread de reconnaissance, la galerie ne doit pas toucher à Tk
+    from database import connection
+    monkeypatch.setattr(connection.messagebox, 'showerror',
+                        lambda *args: pytest.fail("messagebox called outside the Tk thread"))
+    db = connection.DatabaseConnection(use_local=True)
+    db.config['database'] = str(tmp_path / 'missing' / 'test.db')
+    gallery = FaceGallery(db, snapshot_dir=str(tmp_path / 'gallery'))
+    with pytest.raises(ConnectionError):
+        gallery.ensure_loaded()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from settings import Settings
+from src import face_matcher
+from src.face_gallery import FaceGallery
+from src.quantized_index import QuantizedIndex
+from tests.conftest import search_results
+
+
+@pytest.fixture
+def synthetic():
+    """Galerie de 400 modèles (100 identités) et 100 requêtes bruitées"""
+    rng = np.random.default_rng(1)
+    centers = rng.normal(0, 1, (100, 256))
+    labels = rng.integers(0, len(centers), 400)
+    matrix = centers[labels] + rng.normal(0, 0.5, (len(labels), 256))
+    queries = centers[rng.integers(0, len(centers), 100)] + rng.normal(0, 0.5, (100, 256))
+    return face_matcher.prepare_gallery(matrix), queries
+
+
+def test_int8_rerank_matches_float64(synthetic):
+    prepared, queries = synthetic
+    index = QuantizedIndex(rerank=Settings.QUANTIZED_RERANK).build(prepared)
+    for query in queries:
+        exact = face_matcher.best_match(query, prepared)
+        found = index.search(query, prepared)
+        assert found[0] == exact[0]
+        assert found[1] - exact[1] == 0
+
+
+def test_int8_search_restricted_to_rows(synthetic):
+    prepared, queries = synthetic
+    index = QuantizedIndex(rerank=Settings.QUANTIZED_RERANK).build(prepared)
+    rows = np.arange(0, len(prepared), 3)
+    for query in queries:
+        best, confidence = face_matcher.best_match(query, prepared.subset(rows))
+        expected = (None, 0) if best is None else (int(rows[best]), confidence)
+        assert index.search(query, prepared, rows=rows) == expected
+
+
+def test_appended_index_matches_rebuilt_index(synthetic):
+    prepared, queries = synthetic
+    index = QuantizedIndex().build(prepared.subset(np.arange(300)))
+    index.add(prepared.subset(np.arange(300, len(prepared))))
+    rebuilt = QuantizedIndex().build(prepared)
+    assert np.array_equal(index.codes, rebuilt.codes)
+    assert np.array_equal(index.scales, rebuilt.scales)
+
+
+@pytest.mark.parametrize('template_mode', ['image', 'medoids'])
+def test_quantized_gallery_matches_float64_after_append_and_reload(db, faces, tmp_path, monkeypatch, template_mode):
+    student_ids, probes, append = faces
+    monkeypatch.setattr(Settings, 'GALLERY_QUANTIZED', True)
+    quantized = FaceGallery(db, template_mode=template_mode).ensure_loaded()
+    append()
+    quantized.invalidate()
+    quantized.ensure_loaded()
+    reloaded = FaceGallery(db, template_mode=template_mode).ensure_loaded()
+
+    # Recherche exhaustive float64 de référence (sans index)
+    monkeypatch.setattr(Settings, 'GALLERY_QUANTIZED', False)
+    monkeypatch.setattr(Settings, 'ANN_MIN_GALLERY', 10 ** 9)
+    exact = FaceGallery(db, snapshot_dir=str(tmp_path / 'exact'), template_mode=template_mode).ensure_loaded()
+    assert exact.index is None
+
+    expected = search_results(exact, probes)
+    assert search_results(quantized, probes) == expected
+    assert search_results(reloaded, probes) == expected
+
+    # Vecteurs exacts lus dans l'instantané ; les classes ne gardent que des numéros de lignes
+    for gallery in (quantized, reloaded):
+        assert isinstance(gallery.prepared.standardized, np.memmap)
+        assert gallery._partition_cache[2] is None
@@ -0,0 +1,54 @@
+from database.migrations import MIGRATIONS, apply_migrations, check_query_plans, current_version
+
+PRESENCES = "SELECT etudiant_id, date_presence, periode, statut FROM Presences ORDER BY id"
+
+
+def test_hot_queries_use_an_index(db):
+    # Les migrations sont appliquées à la création de la réserve de connexions
+    assert check_query_plans(db) == []
+
+
+def test_missing_index_is_reported(db):
+    check_query_plans(db)
+    with db.transaction() as transaction:
+        transaction.execute("DROP INDEX idx_classe_nom")
+    # Nouvelles connexions : SQLite garde en cache le plan des EXPLAIN déjà préparés
+    db.close()
+    assert [name for name, _ in check_query_plans(db)] == ["classe par nom (get_class_id)"]
+
+
+def test_duplicate_presences_migration_is_idempotent(db):
+    # Connexion hors réserve : la réserve appliquerait les migrations dès sa création
+    connection = db._open()
+    try:
+        # Schéma d'avant les migrations, avec deux présences en double
+        db._create_local_tables(connection)
+        connection.commit()
+        student_id = connection.execute(
+            "INSERT INTO Etudiants (nom_famille, prenom, id_classe, annee_scolaire) "
+            "VALUES ('Nom', 'Prenom', 1, '2024')").lastrowid
+        rows = [(student_id, '2024-01-01', 'Matin', 'Absent'),
+                (student_id, '2024-01-01', 'Matin', 'Présent'),
+                (student_id, '2024-01-01', 'Après-midi', 'Retard')]
+        connection.executemany(
+            "INSERT INTO Presences (etudiant_id, date_presence, heure_presence, periode, statut) "
+            "VALUES (?, ?, '08:00', ?, ?)", rows)
+        connection.commit()
+
+        assert apply_migrations(connection, 'sqlite') == [version for version, _, _ in MIGRATIONS]
+        # La présence la plus récente de chaque (étudiant, jour, période) est conservée
+        expected = [rows[1], rows[2]]
+        assert connection.execute(PRESENCES).fetchall() == expected
+
+        # Une seconde application, puis la migration 2 rejouée telle quelle : aucun changement
+        assert apply_migrations(connection, 'sqlite') == []
+        changes = connection.total_changes
+        duplicates_migration = next(statements for version, _, statements in MIGRATIONS if version == 2)
+        for statement in duplicates_migration['sqlite']:
+            connection.execute(statement)
+        connection.commit()
+        assert connection.total_changes == changes
+        assert connection.execute(PRESENCES).fetchall() == expected
+        assert current_version(connection.cursor()) == MIGRATIONS[-1][0]
+    finally:
+        connection.close()
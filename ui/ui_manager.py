@@ -4,21 +4,36 @@ from PIL import Image, ImageTk
 import os
 import cv2
 import numpy as np
-import pickle
 from src.face_recognition import FaceRecognition 
+from src.face_encoding import encode_features
+from database.attendance_queue import AttendanceQueue
+from settings import Settings
 from styles import ModernStyle
 import time
 
 class UIManager:
+    # Étudiants sans présence enregistrée pour la date et la période (anti-jointure),
+    # éventuellement limités à une classe
+    ABSENCES_QUERY = """
+        {select}
+        FROM Etudiants e
+        JOIN Classe c ON e.id_classe = c.id
+        LEFT JOIN Presences p ON p.etudiant_id = e.id AND p.date_presence = %s AND p.periode = %s
+        WHERE p.id IS NULL {class_filter}
+    """
+
     def __init__(self, db_connection, image_processor, face_db):
         self.db = db_connection
         self.image_processor = image_processor
         self.face_db = face_db
-        self.face_recognition = FaceRecognition(db_connection, image_processor, self)  # Passer self comme référence
+        self.face_recognition = FaceRecognition(db_connection, image_processor, self, face_db.gallery)  # Passer self comme référence
         self.present_students = []  # Liste des élèves présents
+        # Présences écrites en arrière-plan (celles d'une session interrompue d'abord)
+        self.attendance_queue = AttendanceQueue(db_connection).start()
         self.window = tk.Tk()
         self.window.title("EduFace Manager")
         self.window.geometry("1000x800")
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Charger et définir l'icône
         try:
@@ -47,6 +62,13 @@ class UIManager:
         self.create_nav_buttons()
         self.show_welcome()
 
+    def on_close(self):
+        self.face_recognition.stop_camera()
+        # Laisse un court délai pour écrire les présences en attente ; les autres le seront au prochain lancement
+        self.attendance_queue.flush(timeout=Settings.ATTENDANCE_FLUSH_TIMEOUT)
+        self.attendance_queue.stop(timeout=1.0)
+        self.window.destroy()
+
     def create_nav_buttons(self):
         nav_frame = ttk.Frame(self.main_frame, style='Modern.TFrame')
         nav_frame.pack(fill='x', pady=20)
@@ -196,8 +218,9 @@ class UIManager:
             """, (
                 student_id,
                 new_image_path,
-                pickle.dumps(self.current_image['encoding'])
+                encode_features(self.current_image['encoding'], self.current_image['extractor'])
             ))
+            self.face_recognition.gallery.invalidate()
             
             messagebox.showinfo("Succès", "Image ajoutée avec succès")
             
@@ -238,6 +261,8 @@ class UIManager:
         welcome_label.pack(expand=True)
     
     def clear_content(self):
+        # Quitter l'écran de reconnaissance libère la caméra et l'analyseur
+        self.face_recognition.stop_camera()
         for widget in self.content_frame.winfo_children():
             widget.destroy()
     
@@ -455,31 +480,9 @@ class UIManager:
             # Ajouter l'étudiant à la liste des présents
             self.present_students.append(student_data)
             
-            # Enregistrer la présence dans la base de données
-            self.db.execute_query("""
-                INSERT INTO Presences (etudiant_id, date_presence, heure_presence, heure_fin, periode, statut)
-                SELECT e.id, %s, %s, %s, %s, %s
-                FROM Etudiants e
-                WHERE e.nom_famille = %s AND e.prenom = %s AND e.id_classe = %s
-                ON DUPLICATE KEY UPDATE 
-                    statut = %s,
-                    heure_presence = %s,
-                    heure_fin = %s,
-                    periode = %s
-            """, (
-                student_data['date'],
-                student_data['heure'],
-                student_data['heure_fin'],
-                student_data['periode'],
-                student_data['statut'],
-                student_data['nom'],
-                student_data['prenom'],
-                student_data['classe_id'],
-                student_data['statut'],
-                student_data['heure'],
-                student_data['heure_fin'],
-                student_data['periode']
-            ))
+            # Enregistrer la présence : mise en file locale, écrite dans la base de données
+            # par un thread (une ligne par étudiant, jour et période)
+            self.attendance_queue.put(student_data)
             
             # Créer une fenêtre temporaire pour afficher la notification
             notification_window = tk.Toplevel(self.window)
@@ -592,6 +595,25 @@ class UIManager:
         self.mark_student_present(student_data)
         # ... autres actions (sauvegarde, affichage, etc.) 
 
+    def record_absences(self, date, heure, periode, classe=None):
+        """Enregistre comme absents les étudiants sans présence ; retourne [(nom, prénom, classe)]"""
+        class_filter = "AND c.nom_classe = %s" if classe else ""
+        params = (date, periode) + ((classe,) if classe else ())
+        # Liste et insertion dans la même transaction
+        with self.db.transaction() as transaction:
+            absents = transaction.execute(
+                self.ABSENCES_QUERY.format(select="SELECT e.nom_famille, e.prenom, c.nom_classe",
+                                           class_filter=class_filter)
+                + " ORDER BY e.nom_famille, e.prenom", params) or []
+            if absents:
+                # Une seule insertion pour tous les absents
+                transaction.execute(
+                    "INSERT INTO Presences (etudiant_id, date_presence, heure_presence, periode, statut) "
+                    + self.ABSENCES_QUERY.format(select="SELECT e.id, %s, %s, %s, 'Absent'",
+                                                 class_filter=class_filter),
+                    (date, heure, periode) + params)
+        return absents
+
     def check_absences(self):
         """Vérifie et affiche les étudiants absents"""
         try:
@@ -599,19 +621,15 @@ class UIManager:
             current_date = time.strftime('%Y-%m-%d')
             current_time = time.strftime('%H:%M')
             
-            # Obtenir tous les étudiants
-            query = """
-                SELECT e.id, e.nom_famille, e.prenom, c.nom_classe, c.id as classe_id
-                FROM Etudiants e
-                JOIN Classe c ON e.id_classe = c.id
-            """
+            # Les présences encore en file doivent être écrites avant le calcul des absents
+            if not self.attendance_queue.flush(timeout=Settings.ATTENDANCE_FLUSH_TIMEOUT):
+                messagebox.showwarning("Attention", "Des présences n'ont pas encore pu être enregistrées : "
+                                       "la liste des absents peut être incomplète.")
             
             # Appliquer le filtre de classe si sélectionné
-            if self.classe_filter.get() != 'Toutes les classes':
-                query += " WHERE c.nom_classe = %s"
-                students = self.db.execute_query(query, (self.classe_filter.get(),))
-            else:
-                students = self.db.execute_query(query)
+            classe = self.classe_filter.get()
+            absents = self.record_absences(current_date, current_time, self.get_current_period(),
+                                           None if classe == 'Toutes les classes' else classe)
 
             # Créer une nouvelle fenêtre pour afficher les absents
             absent_window = tk.Toplevel(self.window)
@@ -636,27 +654,8 @@ class UIManager:
             tree.pack(side='left', fill='both', expand=True)
             scrollbar.pack(side='right', fill='y')
 
-            # Pour chaque étudiant, vérifier s'il est présent
-            for student in students:
-                student_id, nom, prenom, classe, classe_id = student
-                
-                # Vérifier si l'étudiant est marqué comme présent aujourd'hui
-                presence = self.db.execute_query("""
-                    SELECT statut FROM Presences 
-                    WHERE etudiant_id = %s 
-                    AND date_presence = %s
-                """, (student_id, current_date))
-
-                # Si pas de présence enregistrée, marquer comme absent
-                if not presence:
-                    # Insérer l'absence dans la base de données
-                    self.db.execute_query("""
-                        INSERT INTO Presences (etudiant_id, date_presence, heure_presence, statut)
-                        VALUES (%s, %s, %s, %s)
-                    """, (student_id, current_date, current_time, 'Absent'))
-                    
-                    # Ajouter à l'affichage
-                    tree.insert('', 'end', values=(nom, prenom, classe, 'Absent'))
+            for nom, prenom, classe in absents:
+                tree.insert('', 'end', values=(nom, prenom, classe, 'Absent'))
 
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors de la vérification des absences : {str(e)}")